@@ -0,0 +1,87 @@
+"""Micro-benchmark: YOLO.predict() vs the lean inference path.
+
+    python -m benchmarks.bench_inference --model yolov8n.pt --image frame.jpg --runs 200
+
+Both paths run on the same frame with the same settings; the script reports
+per-frame latency and checks that they return the same boxes, both at
+--imgsz and at --odd-imgsz (not a stride multiple, so it has to be rounded).
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List, Sequence
+
+import cv2
+import numpy as np
+
+from src.core.metrics import percentiles
+from src.perception.lean_inference import LeanPredictor
+from src.perception.model_registry import ModelKey, get_registry
+
+
+def _time(fn: Callable[[], np.ndarray], runs: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return samples
+
+
+def _report(name: str, samples: List[float]) -> None:
+    p = percentiles(samples)
+    print(
+        f"{name:8s} mean={statistics.mean(samples):7.2f}ms  p50={p['p50']:7.2f}ms  "
+        f"p95={p['p95']:7.2f}ms  max={p['max']:7.2f}ms  stdev={statistics.pstdev(samples):6.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--odd-imgsz", type=int, default=600, help="extra size checked for identical boxes")
+    parser.add_argument("--image", default=None, help="test frame (default: random 640x480 noise)")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--classes", default="", help="class ids to keep, comma separated")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.image:
+        image = cv2.imread(args.image, cv2.IMREAD_COLOR)
+        if image is None:
+            raise SystemExit(f"cannot read {args.image}")
+    else:
+        image = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    classes: Sequence[int] | None = [int(c) for c in args.classes.split(",") if c.strip()] or None
+
+    handle = get_registry().acquire(ModelKey(args.model, args.device, args.imgsz))
+    lean = LeanPredictor(handle, conf=args.conf)
+
+    def predict(imgsz: int = args.imgsz) -> np.ndarray:
+        results = handle.model.predict(
+            source=image, imgsz=imgsz, conf=args.conf, classes=classes, device=args.device, verbose=False
+        )
+        return results[0].boxes.data.cpu().numpy()
+
+    def lean_predict(imgsz: int | None = None) -> np.ndarray:
+        return lean(image, classes, imgsz=imgsz)
+
+    for imgsz in dict.fromkeys((args.imgsz, args.odd_imgsz)):
+        ref, out = predict(imgsz), lean_predict(imgsz)
+        same = ref.shape == out.shape and (ref.size == 0 or np.allclose(ref, out, atol=1e-2))
+        print(f"frame {image.shape[1]}x{image.shape[0]} imgsz={imgsz}: {len(ref)} boxes via predict, "
+              f"{len(out)} via lean, {'identical' if same else 'DIFFERENT'}")
+
+    _report("predict", _time(predict, args.runs, args.warmup))
+    _report("lean", _time(lean_predict, args.runs, args.warmup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Throughput of remote inference vs. number of workers.
+
+    python -m benchmarks.bench_remote_pool --workers 1 2 4 --delay-ms 100
+
+Starts stub workers that answer every frame with one box after a fixed
+delay (no model needed), feeds YoloInference in remote mode faster than the
+workers can keep up, and reports how many results per second were applied.
+With frames in flight on every worker, throughput should grow roughly
+linearly with the worker count.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+from src.communication.image_receiver.protocols import encode_message, read_message
+from src.core.events import Event, EventBus
+from src.perception import ImageMessage
+from src.perception.remote import InferencePool, WorkerEndpoint
+from src.perception.yolo_inference import YoloInference
+
+
+async def _stub_worker(delay: float) -> Tuple[asyncio.AbstractServer, int]:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(encode_message({"type": "hello", "model": "stub", "names": {"39": "bottle"}}))
+        try:
+            while True:
+                request, _ = await read_message(reader)
+                await asyncio.sleep(delay)  # one frame at a time, like the real worker
+                writer.write(encode_message({
+                    "type": "result", "id": request["id"], "boxes": [[300, 200, 340, 280, 0.9, 39]],
+                    "height": 480, "width": 640,
+                }))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def _measure(workers: int, delay: float, seconds: float, input_fps: float) -> float:
+    servers: List[asyncio.AbstractServer] = []
+    endpoints = []
+    for _ in range(workers):
+        server, port = await _stub_worker(delay)
+        servers.append(server)
+        endpoints.append(WorkerEndpoint("127.0.0.1", port))
+
+    bus = EventBus()
+    applied = 0
+
+    def on_result(_event: Event) -> None:
+        nonlocal applied
+        applied += 1
+
+    bus.subscribe("detections_found", on_result)
+    try:
+        async with bus, InferencePool(endpoints) as pool:
+            yolo = YoloInference("stub", bus, device="cpu", remote=pool)
+            async with yolo:
+                yolo.set_targets(["bottle"])
+                message = ImageMessage(content_type="image/jpeg", data=b"\xff\xd8" + bytes(20_000))
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                while loop.time() - start < seconds:
+                    await bus.publish(Event(
+                        type="image_received",
+                        payload={"message": message, "received_at": time.monotonic()},
+                    ))
+                    await asyncio.sleep(1.0 / input_fps)
+                elapsed = loop.time() - start
+                count = applied
+    finally:
+        for server in servers:
+            server.close()
+        # Let stub handlers see the closed connections and finish their current frame
+        await asyncio.sleep(delay + 0.05)
+    return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--delay-ms", type=float, default=100.0, help="stub inference time per frame")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--input-fps", type=float, default=50.0)
+    args = parser.parse_args()
+
+    baseline = None
+    for n in args.workers:
+        rate = asyncio.run(_measure(n, args.delay_ms / 1000.0, args.seconds, args.input_fps))
+        baseline = baseline or rate
+        print(f"{n} worker(s): {rate:6.1f} results/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Soak test: run the full pipeline for hours and fail on slow growth.
+
+    python -m benchmarks.soak --duration 2h --output soak.json
+
+The server is wired exactly as in run_app (build_app / start_app) and fed by
+the simulator's synthetic camera and fake JetBot. Every `--interval` seconds
+the harness records RSS, traced Python memory, live object and GC counts, bus
+queue depths and delays, loop lag, inference latency and subscriber counts.
+After `--warmup`, the first sample is the baseline. The run fails (exit code
+1) when memory, queues, latency or subscribers grow past the thresholds. The
+JSON report includes the top allocation sites that grew since the baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.core.config import AppConfig
+from src.core.logging import logger, setup_logging
+from src.simulation.simulator import Simulator
+from src.simulation.world import Target
+
+
+@dataclass
+class SoakSample:
+    t: float
+    rss_mb: float
+    traced_mb: float
+    objects: int
+    gc_collections: List[int]  # per generation, cumulative
+    bus_depth: int
+    bus_perception_p95_ms: float
+    bus_control_p95_ms: float
+    loop_lag_p95_ms: float
+    inference_ms: float
+    capture_to_command_ms: Optional[float]
+    subscribers: int
+    frames_sent: int
+
+
+def _parse_duration(text: str) -> float:
+    """Seconds from `90`, `30s`, `45m` or `2h`."""
+    text = text.strip().lower()
+    units = {"s": 1.0, "m": 60.0, "h": 3600.0}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def rss_mb() -> float:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource  # not on Windows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024.0
+
+
+def _slope_per_hour(ts: Sequence[float], ys: Sequence[float]) -> float:
+    """Least-squares slope of ys over ts (seconds), per hour."""
+    if len(ts) < 2:
+        return 0.0
+    mt, my = statistics.fmean(ts), statistics.fmean(ys)
+    var = sum((t - mt) ** 2 for t in ts)
+    if var == 0:
+        return 0.0
+    return sum((t - mt) * (y - my) for t, y in zip(ts, ys)) / var * 3600.0
+
+
+class SoakRun:
+    def __init__(self, sim: Simulator, interval: float, warmup: float, trace_frames: int) -> None:
+        self._sim = sim
+        self._interval = interval
+        self._warmup = warmup
+        self._trace_frames = trace_frames
+        self.samples: List[SoakSample] = []
+        self.baseline: Optional[SoakSample] = None
+        self._baseline_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.top_growth: List[str] = []
+
+    async def run(self) -> Dict[str, Any]:
+        if self._trace_frames:
+            tracemalloc.start(self._trace_frames)
+        sim_task = asyncio.create_task(self._sim.run())
+        try:
+            await self._sample_until(sim_task)
+            result = await sim_task
+        finally:
+            if not sim_task.done():
+                sim_task.cancel()
+        if self._baseline_snapshot is not None:
+            stats = tracemalloc.take_snapshot().compare_to(self._baseline_snapshot, "lineno")
+            self.top_growth = [str(s) for s in stats[:15]]
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return result
+
+    async def _sample_until(self, sim_task: asyncio.Task) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while not sim_task.done():
+            await asyncio.wait({sim_task}, timeout=self._interval)
+            app = self._sim.app
+            if sim_task.done() or app is None:
+                continue
+            sample = self._sample(app, loop.time() - start)
+            self.samples.append(sample)
+            if self.baseline is None and sample.t >= self._warmup:
+                self.baseline = sample
+                if tracemalloc.is_tracing():
+                    self._baseline_snapshot = tracemalloc.take_snapshot()
+            logger.info(
+                f"[soak] t={sample.t:.0f}s rss={sample.rss_mb:.1f}MB traced={sample.traced_mb:.1f}MB "
+                f"objects={sample.objects} depth={sample.bus_depth} lag_p95={sample.loop_lag_p95_ms:.1f}ms "
+                f"infer={sample.inference_ms:.1f}ms subscribers={sample.subscribers}"
+            )
+
+    def _sample(self, app, t: float) -> SoakSample:
+        bus = app.bus.stats()
+        lag = app.watchdog.snapshot()["p95"] if app.watchdog is not None else 0.0
+        camera = self._sim.camera_client
+        return SoakSample(
+            t=t,
+            rss_mb=rss_mb(),
+            traced_mb=tracemalloc.get_traced_memory()[0] / 2 ** 20 if tracemalloc.is_tracing() else 0.0,
+            objects=len(gc.get_objects()),
+            gc_collections=[s["collections"] for s in gc.get_stats()],
+            bus_depth=app.bus.qsize(),
+            bus_perception_p95_ms=bus["perception"]["p95"],
+            bus_control_p95_ms=bus["control"]["p95"],
+            loop_lag_p95_ms=lag,
+            inference_ms=(app.yolo.inference_latency or 0.0) * 1000.0,
+            capture_to_command_ms=app.yolo.capture_to_command_ms,
+            subscribers=sum(app.bus.subscriber_counts().values()),
+            frames_sent=camera.frames_sent if camera is not None else 0,
+        )
+
+
+@dataclass
+class Thresholds:
+    max_rss_growth_mb: float = 64.0
+    max_rss_slope_mb_h: float = 32.0
+    max_object_growth: int = 50_000
+    max_queue_depth: int = 32
+    max_latency_growth: float = 2.0  # last third vs first third, ratio
+    latency_floor_ms: float = 10.0  # ...and at least this many ms worse
+
+
+def evaluate(samples: List[SoakSample], baseline: Optional[SoakSample], th: Thresholds) -> List[str]:
+    """Human-readable threshold violations; empty when the run passed."""
+    if baseline is None:
+        return ["no sample after warmup; run longer than --warmup"]
+    steady = [s for s in samples if s.t >= baseline.t]
+    last = steady[-1]
+    failures: List[str] = []
+
+    rss_growth = last.rss_mb - baseline.rss_mb
+    if rss_growth > th.max_rss_growth_mb:
+        failures.append(f"RSS grew {rss_growth:.1f}MB > {th.max_rss_growth_mb:.1f}MB")
+    slope = _slope_per_hour([s.t for s in steady], [s.rss_mb for s in steady])
+    if len(steady) >= 4 and slope > th.max_rss_slope_mb_h:
+        failures.append(f"RSS trend {slope:.1f}MB/h > {th.max_rss_slope_mb_h:.1f}MB/h")
+    objects = last.objects - baseline.objects
+    if objects > th.max_object_growth:
+        failures.append(f"live objects grew by {objects} > {th.max_object_growth}")
+    depth = max(s.bus_depth for s in steady)
+    if depth > th.max_queue_depth:
+        failures.append(f"bus queue depth reached {depth} > {th.max_queue_depth}")
+    if last.subscribers > baseline.subscribers:
+        failures.append(f"bus subscribers grew from {baseline.subscribers} to {last.subscribers}")
+
+    third = len(steady) // 3
+    if third >= 2:
+        for name in ("bus_perception_p95_ms", "bus_control_p95_ms", "loop_lag_p95_ms", "inference_ms"):
+            early = statistics.median(getattr(s, name) for s in steady[:third])
+            late = statistics.median(getattr(s, name) for s in steady[-third:])
+            if late > early * th.max_latency_growth and late - early > th.latency_floor_ms:
+                failures.append(f"{name} rose from {early:.1f} to {late:.1f}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", default="10m", help="steady-state run time after warmup, e.g. 600, 30m, 4h")
+    parser.add_argument("--warmup", default="60s", help="time before the baseline sample")
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds between samples")
+    parser.add_argument("--target", default="person", help="class(es) to track, comma separated")
+    parser.add_argument("--sprite", default=None, help="image pasted as the target (default: built-in person)")
+    parser.add_argument("--fps", type=float, default=5.0, help="camera frame rate")
+    parser.add_argument("--trace-frames", type=int, default=1, help="tracemalloc stack depth (0 disables)")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=Thresholds.max_rss_growth_mb)
+    parser.add_argument("--max-rss-slope-mb-h", type=float, default=Thresholds.max_rss_slope_mb_h)
+    parser.add_argument("--max-object-growth", type=int, default=Thresholds.max_object_growth)
+    parser.add_argument("--max-queue-depth", type=int, default=Thresholds.max_queue_depth)
+    parser.add_argument("--max-latency-growth", type=float, default=Thresholds.max_latency_growth)
+    parser.add_argument("--latency-floor-ms", type=float, default=Thresholds.latency_floor_ms)
+    parser.add_argument("--output", default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    setup_logging()
+    warmup = _parse_duration(args.warmup)
+    duration = _parse_duration(args.duration)
+    sim = Simulator(
+        AppConfig.load(),
+        duration=warmup + duration,
+        targets=[t.strip() for t in args.target.split(",") if t.strip()],
+        # Keep the robot turning and driving for the whole run
+        target=Target(2.0, 1.0, width=0.15, orbit_radius=1.0, orbit_speed=0.2),
+        sprite_path=args.sprite,
+        camera_fps=args.fps,
+    )
+    soak = SoakRun(sim, interval=args.interval, warmup=warmup, trace_frames=args.trace_frames)
+    thresholds = Thresholds(
+        args.max_rss_growth_mb, args.max_rss_slope_mb_h, args.max_object_growth,
+        args.max_queue_depth, args.max_latency_growth, args.latency_floor_ms,
+    )
+
+    started = time.time()
+    result = asyncio.run(soak.run())
+    failures = evaluate(soak.samples, soak.baseline, thresholds)
+
+    report = {
+        "passed": not failures,
+        "failures": failures,
+        "wall_time_s": time.time() - started,
+        "thresholds": asdict(thresholds),
+        "baseline": asdict(soak.baseline) if soak.baseline else None,
+        "final": asdict(soak.samples[-1]) if soak.samples else None,
+        "top_allocation_growth": soak.top_growth,
+        "simulation": result,
+        "samples": [asdict(s) for s in soak.samples],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    for line in soak.top_growth[:5]:
+        print(f"  {line}")
+    if failures:
+        print("SOAK FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"SOAK PASSED ({len(soak.samples)} samples)")
+
+
+if __name__ == "__main__":
+    main()
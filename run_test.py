@@ -5,14 +5,13 @@
 import asyncio
 import signal
 import cv2
-import numpy as np
 from contextlib import AsyncExitStack
 
 from src.core.config import AppConfig
 from src.core.logging import setup_logging, logger
 from src.core.events import EventBus, Event
 from src.communication.image_receiver.server import ImageServer
-from src.perception.yolo_inference import YoloInference
+from src.perception.yolo_inference import YoloInference, decode_image
 
 # 直接將 DebugMonitor 定義在這裡，方便測試
 class DebugMonitor:
@@ -31,10 +30,9 @@ class DebugMonitor:
 
     async def _on_image(self, event: Event):
         try:
-            image_bytes = event.payload.get("bytes")
-            if image_bytes:
-                nparr = np.frombuffer(image_bytes, np.uint8)
-                self._last_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            message = event.payload.get("message")
+            if message is not None:
+                self._last_image = decode_image(message)
         except Exception:
             pass
 
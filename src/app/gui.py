@@ -16,7 +16,8 @@ class SimpleTargetSelector:
         gui.start()
         # later: gui.stop()
 
-    The GUI will call yolo.set_target(selected) when the user selects a class.
+    Several classes can be selected at once; the GUI calls
+    yolo.set_targets(selected) whenever the selection changes.
     """
 
     def __init__(self, yolo: YoloInference, targets: Iterable[str]) -> None:
@@ -31,7 +32,7 @@ class SimpleTargetSelector:
         if self._thread and self._thread.is_alive():
             return
         self._running.set()
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread = threading.Thread(target=self._run, name="gui", daemon=True)
         self._thread.start()
         logger.info("SimpleTargetSelector GUI started")
 
@@ -50,18 +51,13 @@ class SimpleTargetSelector:
     def _on_select(self, event: tk.Event | None = None) -> None:
         if not self._listbox:
             return
-        sel = self._listbox.curselection()
-        if not sel:
-            # Nothing selected -> clear target
-            self._yolo.set_target("")
-            return
-        idx = sel[0]
-        target = self._targets[idx]
+        # Nothing selected -> clears the targets
+        targets = [self._targets[idx] for idx in self._listbox.curselection()]
         try:
-            self._yolo.set_target(target)
-            logger.info(f"GUI set target: {target}")
+            self._yolo.set_targets(targets)
+            logger.info(f"GUI set targets: {targets}")
         except Exception as e:
-            logger.error(f"Failed to set target from GUI: {e}")
+            logger.error(f"Failed to set targets from GUI: {e}")
 
     def _run(self) -> None:
         # Create the Tk root and widgets in this thread
@@ -72,10 +68,10 @@ class SimpleTargetSelector:
         frame = tk.Frame(root, padx=8, pady=8)
         frame.pack(fill=tk.BOTH, expand=True)
 
-        label = tk.Label(frame, text="Choose target class:")
+        label = tk.Label(frame, text="Choose target classes:")
         label.pack(anchor=tk.W)
 
-        listbox = tk.Listbox(frame, height=min(10, len(self._targets)), exportselection=False)
+        listbox = tk.Listbox(frame, height=min(10, len(self._targets)), selectmode=tk.MULTIPLE, exportselection=False)
         for t in self._targets:
             listbox.insert(tk.END, t)
         listbox.pack(fill=tk.BOTH, expand=True)
@@ -108,8 +104,8 @@ class SimpleTargetSelector:
         if self._listbox:
             self._listbox.selection_clear(0, tk.END)
         try:
-            self._yolo.set_target("")
-            logger.info("GUI cleared target")
+            self._yolo.set_targets([])
+            logger.info("GUI cleared targets")
         except Exception as e:
             logger.error(f"Failed to clear target from GUI: {e}")
 
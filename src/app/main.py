@@ -6,52 +6,136 @@ from __future__ import annotations
 import asyncio
 import signal
 from contextlib import AsyncExitStack
+from dataclasses import dataclass
 
 from src.task_manager.motor_controller import Commander
 from src.communication.jetbot_api.controller import Controller
 from src.core.config import AppConfig
 from src.core.logging import setup_logging, logger
 from src.core.events import EventBus
+from src.core.watchdog import LoopWatchdog
+from src.core.profiler import ProfilerControl, SamplingProfiler
 from src.communication.image_receiver.server import ImageServer
+from src.communication.image_receiver.quality import QualityGovernor
 from src.random_walk.random_walk import RandomWalkDaemon
 from src.perception.yolo_inference import YoloInference
+from src.perception.model_registry import ModelKey, get_registry
+from src.perception.remote import InferencePool, parse_workers
 from src.app.gui import SimpleTargetSelector
+from src.app.preview import PreviewServer
 
 
-async def run_app() -> None:
-    setup_logging()
-    cfg = AppConfig.load()
+# 1. (來自 yolov8.py) 定義你要偵測的目標類別
+TARGET_CLASSES = [
+    "handbag", "remote", "bottle", "cup", "laptop",
+    "mouse", "cell phone", "wallet", "scissors", "book", "person"
+]
+
+
+@dataclass
+class App:
+    """All services of one server instance, wired but not started."""
+    cfg: AppConfig
+    bus: EventBus
+    controller: Controller
+    image_server: ImageServer
+    random_walk: RandomWalkDaemon
+    yolo: YoloInference
+    task_manager: Commander
+    watchdog: LoopWatchdog | None = None
+    inference_pool: InferencePool | None = None
 
-    logger.info(f"Starting app on {cfg.app_host}:{cfg.app_port} (transport={cfg.transport})")
 
-    bus = EventBus()
-    image_server = ImageServer(cfg, bus)
+def build_app(cfg: AppConfig) -> App:
+    bus = EventBus(scheduling=cfg.bus_scheduling)
     random_walk = RandomWalkDaemon()
     controller = Controller(cfg,bus)
-    # 1. (來自 yolov8.py) 定義你要偵測的目標類別
-    target_classes_list = [
-        "handbag", "remote", "bottle", "cup", "laptop",
-        "mouse", "cell phone", "wallet", "scissors", "book", "person"
-    ]
 
-    # 2. 使用 config.py 中的設定來初始化 YOLO
+    # 2. 使用 config.py 中的設定來初始化 YOLO (models are shared through the registry)
+    registry = get_registry()
+    registry.set_budget(cfg.model_cache_mb)
+    # With INFERENCE_WORKERS set, frames are sent to worker processes instead
+    inference_pool = None
+    if cfg.inference_workers:
+        inference_pool = InferencePool(parse_workers(cfg.inference_workers), timeout=cfg.inference_timeout_s)
     yolo = YoloInference(
-        model_path="yolov8s.pt",  # 來自 config
+        model_path=cfg.yolo_model,  # 來自 config
         bus=bus,
         device=cfg.yolo_device,  # 來自 config
-        target_classes=target_classes_list,  # 傳入你要過濾的類別
+        target_classes=TARGET_CLASSES,  # 傳入你要過濾的類別
         #target_classes=None,
         conf_threshold=0.5,  # 你可以自行調整此閾值
-        image_size = (cfg.img_width, cfg.img_height)
+        image_size=(cfg.img_height, cfg.img_width),
+        max_frame_age_ms=cfg.frame_max_age_ms,
+        frame_age_reference=cfg.frame_age_reference,
+        imgsz=cfg.yolo_imgsz,
+        registry=registry,
+        lean=cfg.yolo_lean,
+        roi=cfg.yolo_roi,
+        roi_padding=cfg.yolo_roi_padding,
+        roi_imgsz=cfg.yolo_roi_imgsz,
+        roi_refresh_every=cfg.yolo_roi_refresh,
+        remote=inference_pool
     )
 
-    # Start a small GUI to set the detection target
-    gui = SimpleTargetSelector(yolo, target_classes_list)
-    gui.start()
+    # Frames are received here; quality hints follow the YOLO latency and bus backlog
+    governor = QualityGovernor(cfg, bus, latency_source=lambda: yolo.inference_latency)
+    image_server = ImageServer(cfg, bus, governor=governor)
 
     # 3. (修改) 將 yolo 實例傳遞給 Commander
     task_manager = Commander(bus, random_walk, yolo)
 
+    watchdog = LoopWatchdog(threshold_ms=cfg.loop_lag_threshold_ms) if cfg.loop_watchdog else None
+    return App(cfg, bus, controller, image_server, random_walk, yolo, task_manager, watchdog, inference_pool)
+
+
+async def start_app(app: App, stack: AsyncExitStack) -> None:
+    """Start every service of `app`; they are stopped when `stack` closes."""
+    cfg = app.cfg
+    if app.watchdog is not None:
+        await stack.enter_async_context(app.watchdog)
+    profiler = SamplingProfiler(cfg.profile_dir, cfg.profile_interval_ms, cfg.profile_seconds)
+    await stack.enter_async_context(ProfilerControl(profiler, cfg.profile_control_port))
+
+    # 確保所有服務都被 AsyncExitStack 管理
+    await stack.enter_async_context(app.controller)
+    await stack.enter_async_context(app.bus)
+    await stack.enter_async_context(app.image_server)
+    await stack.enter_async_context(app.random_walk)
+
+    # --- MODIFIED: 確保 YOLO 服務也被啟動 ---
+    if app.inference_pool is not None:
+        await stack.enter_async_context(app.inference_pool)
+    await stack.enter_async_context(app.yolo)
+    preload = [ModelKey(p.strip(), cfg.yolo_device, cfg.yolo_imgsz) for p in cfg.yolo_preload.split(",") if p.strip()]
+    if preload and app.inference_pool is None:
+        await asyncio.get_running_loop().run_in_executor(None, get_registry().preload, preload)
+
+    await stack.enter_async_context(app.task_manager)
+
+    if cfg.preview_port:
+        preview = await stack.enter_async_context(PreviewServer(
+            app.bus,
+            host=cfg.preview_host,
+            port=cfg.preview_port,
+            fps=cfg.preview_fps,
+            jpeg_quality=cfg.preview_jpeg_quality
+        ))
+        app.yolo.publish_detections = preview.has_viewers
+
+
+async def run_app() -> None:
+    setup_logging()
+    cfg = AppConfig.load()
+
+    logger.info(f"Starting app on {cfg.app_host}:{cfg.app_port} (transport={cfg.transport})")
+
+    app = build_app(cfg)
+
+    # Start a small GUI to set the detection target
+    gui = SimpleTargetSelector(app.yolo, TARGET_CLASSES)
+    gui.start()
+
     # Cooperative shutdown handling
     stop_event = asyncio.Event()
 
@@ -67,16 +151,7 @@ async def run_app() -> None:
             print("Windows without ProactorEventLoop can't set signal handlers; fallback")
 
     async with AsyncExitStack() as stack:
-        # 確保所有服務都被 AsyncExitStack 管理
-        await stack.enter_async_context(controller)
-        await stack.enter_async_context(bus)
-        await stack.enter_async_context(image_server)
-        await stack.enter_async_context(random_walk)
-
-        # --- MODIFIED: 確保 YOLO 服務也被啟動 ---
-        await stack.enter_async_context(yolo)
-
-        await stack.enter_async_context(task_manager)
+        await start_app(app, stack)
 
         logger.info("Services started; awaiting stop event")
         await stop_event.wait()
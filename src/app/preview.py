@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import AbstractAsyncContextManager
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.core.events import EventBus, Event
+from src.core.logging import logger
+from src.perception import ImageMessage
+from src.perception.yolo_inference import Detection, decode_image
+
+_INDEX_HTML = b"""<!doctype html>
+<html><head><title>JetBot preview</title></head>
+<body style="margin:0;background:#111"><img src="/stream" style="max-width:100%"></body></html>
+"""
+
+
+class PreviewServer(AbstractAsyncContextManager):
+    """Headless MJPEG preview of annotated frames over local HTTP.
+
+    Endpoints: `/` (viewer page), `/stream` (multipart MJPEG), `/snapshot.jpg`.
+
+    Bus callbacks only keep a reference to the newest frame / detections, and
+    only while somebody is watching; wire `has_viewers` to
+    `YoloInference.publish_detections` so detections are not even published
+    otherwise. Annotation and JPEG encoding run in a
+    worker task (on the default executor) capped at `fps`, which exists only
+    while at least one viewer is connected.
+    """
+
+    BOUNDARY = b"frame"
+
+    def __init__(
+            self,
+            bus: EventBus,
+            host: str = "127.0.0.1",
+            port: int = 8090,
+            fps: float = 5.0,
+            jpeg_quality: int = 70,
+            detection_max_age: float = 1.0,
+            request_timeout: float = 5.0
+    ) -> None:
+        self._bus = bus
+        self._host = host
+        self._port = port
+        self._period = 1.0 / max(0.1, fps)
+        self._quality = int(jpeg_quality)
+        self._detection_max_age = detection_max_age
+        self._request_timeout = request_timeout
+        self._server: asyncio.AbstractServer | None = None
+
+        self._viewers = 0
+        self._worker: asyncio.Task | None = None
+        self._latest_message: Optional[ImageMessage] = None
+        self._latest_detections: Optional[
+            Tuple[float, Optional[np.ndarray], List[Detection], Optional[ImageMessage]]
+        ] = None
+        self._frame: bytes | None = None
+        self._frame_id = 0
+        self._new_frame = asyncio.Condition()
+        self.stats = {"frames_encoded": 0, "viewers_total": 0}
+
+    # -------------------------
+    # Context manager
+    # -------------------------
+    async def __aenter__(self) -> "PreviewServer":
+        self._bus.subscribe("image_received", self._on_image)
+        self._bus.subscribe("detections_found", self._on_detections)
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        logger.info(f"[PreviewServer] MJPEG preview on http://{self._host}:{self._port}/")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self._stop_worker()
+        logger.info("[PreviewServer] stopped")
+
+    def has_viewers(self) -> bool:
+        return self._viewers > 0
+
+    # -------------------------
+    # Bus callbacks (hot path: O(1), no copies)
+    # -------------------------
+    def _on_image(self, event: Event) -> None:
+        if self._viewers:
+            self._latest_message = event.payload.get("message")
+
+    def _on_detections(self, event: Event) -> None:
+        if self._viewers:
+            # Remote inference publishes no decoded image; the message is decoded when drawn
+            image, message = event.payload.get("image"), event.payload.get("message")
+            if image is not None or message is not None:
+                self._latest_detections = (time.monotonic(), image, event.payload.get("detections", []), message)
+
+    # -------------------------
+    # Worker
+    # -------------------------
+    async def _run_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            job = self._take_job()
+            if job is not None:
+                try:
+                    jpeg = await loop.run_in_executor(None, self._render, *job, self._quality)
+                except Exception as e:
+                    logger.warning(f"[PreviewServer] render failed: {e}")
+                    jpeg = None
+                if jpeg is not None:
+                    async with self._new_frame:
+                        self._frame = jpeg
+                        self._frame_id += 1
+                        self.stats["frames_encoded"] += 1
+                        self._new_frame.notify_all()
+            await asyncio.sleep(max(0.0, self._period - (loop.time() - started)))
+
+    def _take_job(self) -> Optional[Tuple[Optional[np.ndarray], List[Detection], Optional[ImageMessage]]]:
+        """Pick the newest thing worth drawing; each input is rendered at most once."""
+        detections, self._latest_detections = self._latest_detections, None
+        if detections is not None and time.monotonic() - detections[0] <= self._detection_max_age:
+            self._latest_message = None
+            return detections[1], detections[2], detections[3]
+        message, self._latest_message = self._latest_message, None
+        if message is not None:
+            return None, [], message
+        return None
+
+    @staticmethod
+    def _render(
+            image: Optional[np.ndarray],
+            detections: List[Detection],
+            message: Optional[ImageMessage],
+            quality: int
+    ) -> bytes | None:
+        if image is None:
+            image = decode_image(message)
+            if image is None:
+                return None
+        canvas = image.copy()
+        for det in detections:
+            x1, y1, x2, y2 = det.bbox
+            cv2.rectangle(canvas, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(canvas, f"{det.cls} {det.conf:.2f}", (x1, max(12, y1 - 8)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        ok, buf = cv2.imencode(".jpg", canvas, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        return buf.tobytes() if ok else None
+
+    async def _add_viewer(self) -> None:
+        self._viewers += 1
+        self.stats["viewers_total"] += 1
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run_worker())
+
+    async def _remove_viewer(self) -> None:
+        self._viewers -= 1
+        if self._viewers <= 0:
+            self._viewers = 0
+            await self._stop_worker()
+
+    async def _stop_worker(self) -> None:
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        # Drop references so an idle preview holds no frames
+        self._latest_message = None
+        self._latest_detections = None
+        self._frame = None
+
+    async def _next_frame(self, last_id: int) -> Tuple[bytes, int]:
+        async with self._new_frame:
+            await self._new_frame.wait_for(lambda: self._frame is not None and self._frame_id != last_id)
+            return self._frame, self._frame_id
+
+    # -------------------------
+    # HTTP
+    # -------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # Clients that connect and never finish the request must not hold the connection
+            request = await asyncio.wait_for(self._read_request(reader), timeout=self._request_timeout)
+            path = request[1].split("?", 1)[0] if len(request) >= 2 else ""
+            if path == "/stream":
+                await self._stream(writer)
+            elif path == "/snapshot.jpg":
+                await self._snapshot(writer)
+            elif path in ("/", "/index.html"):
+                self._respond(writer, b"200 OK", b"text/html", _INDEX_HTML)
+            else:
+                self._respond(writer, b"404 Not Found", b"text/plain", b"not found\n")
+            await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.warning(f"[PreviewServer] request failed: {e}")
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> List[str]:
+        request = (await reader.readline()).decode("latin-1").split()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass  # ignore headers
+        return request
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: bytes, content_type: bytes, body: bytes) -> None:
+        writer.write(
+            b"HTTP/1.0 " + status + b"\r\nContent-Type: " + content_type
+            + b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\nCache-Control: no-cache\r\n\r\n" + body
+        )
+
+    async def _snapshot(self, writer: asyncio.StreamWriter) -> None:
+        await self._add_viewer()
+        try:
+            frame, _ = await asyncio.wait_for(self._next_frame(-1), timeout=self._request_timeout)
+        except asyncio.TimeoutError:
+            # No frames arriving (camera down or nothing rendered yet)
+            self._respond(writer, b"503 Service Unavailable", b"text/plain", b"no frame available\n")
+            return
+        finally:
+            await self._remove_viewer()
+        self._respond(writer, b"200 OK", b"image/jpeg", frame)
+
+    async def _stream(self, writer: asyncio.StreamWriter) -> None:
+        await self._add_viewer()
+        try:
+            writer.write(
+                b"HTTP/1.0 200 OK\r\nCache-Control: no-cache\r\n"
+                b"Content-Type: multipart/x-mixed-replace; boundary=" + self.BOUNDARY + b"\r\n\r\n"
+            )
+            last_id = -1
+            while True:
+                frame, last_id = await self._next_frame(last_id)
+                writer.write(
+                    b"--" + self.BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                    + str(len(frame)).encode() + b"\r\n\r\n" + frame + b"\r\n"
+                )
+                # A viewer that cannot keep up is disconnected instead of buffering frames
+                await asyncio.wait_for(writer.drain(), timeout=5.0)
+        finally:
+            await self._remove_viewer()
@@ -0,0 +1,214 @@
+"""Wire formats shared by the image server and its clients.
+
+Upstream (client -> server) frames come in two flavours:
+
+  - legacy: 4-byte big-endian length followed by JPEG bytes
+  - v1:     FRAME_MAGIC, a fixed binary header, an optional UTF-8 robot id,
+            then the payload (see ``encode_frame`` for the layout)
+
+FRAME_MAGIC read as a big-endian length is ~2.3 GB, which no legacy client
+can send, so both flavours can share one port.
+
+Inference workers (see perception/remote.py) use ``encode_message`` /
+``read_message``: a JSON header plus an optional binary payload.
+
+Downstream (server -> client) control messages use the same 4-byte big-endian
+length prefix followed by a UTF-8 JSON object with a ``type`` field, so a
+client can read them with the same framing code it already uses for images.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+import time
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+from typing import Any, Dict, Optional, Tuple
+
+from src.perception import ImageMessage
+
+LENGTH_PREFIX_BYTES = 4
+MAX_FRAME_BYTES = 32 * 1024 * 1024
+
+FRAME_MAGIC = b"\x89JBF"
+FRAME_VERSION = 1
+
+CONTROL_QUALITY = "quality"
+
+
+class Codec(IntEnum):
+    UNKNOWN = 0
+    JPEG = 1
+    PNG = 2
+    RAW_BGR = 3  # uint8, height x width x 3
+    YUV_I420 = 4  # uint8 planar, height * 3/2 x width
+
+
+CONTENT_TYPES = {
+    Codec.UNKNOWN: "application/octet-stream",
+    Codec.JPEG: "image/jpeg",
+    Codec.PNG: "image/png",
+    Codec.RAW_BGR: "image/x-raw-bgr",
+    Codec.YUV_I420: "image/x-yuv-i420",
+}
+
+# version, codec, robot_id_len, flags, seq, capture_ts_us, width, height, payload_len
+_HEADER = struct.Struct(">BBBBIQHHI")
+HEADER_SIZE = len(FRAME_MAGIC) + _HEADER.size
+
+
+class ProtocolError(ValueError):
+    """Raised when a client sends a frame we cannot parse."""
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    version: int
+    codec: Codec
+    robot_id_len: int
+    seq: int
+    capture_ts_us: int  # 0 = unknown
+    width: int
+    height: int
+    payload_len: int
+
+
+def expected_payload_size(codec: Codec, width: int, height: int) -> Optional[int]:
+    """Exact payload size for uncompressed codecs, None for compressed ones."""
+    if codec == Codec.RAW_BGR:
+        return width * height * 3
+    if codec == Codec.YUV_I420:
+        return width * height * 3 // 2
+    return None
+
+
+def parse_header(data: bytes) -> FrameHeader:
+    """Parse the fixed header that follows FRAME_MAGIC."""
+    if len(data) != _HEADER.size:
+        raise ProtocolError(f"header must be {_HEADER.size} bytes, got {len(data)}")
+    version, codec, robot_id_len, _flags, seq, capture_us, width, height, payload_len = _HEADER.unpack(data)
+    if version != FRAME_VERSION:
+        raise ProtocolError(f"unsupported frame version {version}")
+    try:
+        codec = Codec(codec)
+    except ValueError:
+        raise ProtocolError(f"unknown codec {codec}") from None
+    if payload_len <= 0 or payload_len > MAX_FRAME_BYTES:
+        raise ProtocolError(f"invalid payload length {payload_len}")
+    expected = expected_payload_size(codec, width, height)
+    if expected is not None and expected != payload_len:
+        raise ProtocolError(
+            f"{codec.name} {width}x{height} needs {expected} bytes, header says {payload_len}"
+        )
+    return FrameHeader(version, codec, robot_id_len, seq, capture_us, width, height, payload_len)
+
+
+def encode_frame(
+        data: bytes,
+        codec: Codec = Codec.JPEG,
+        seq: int = 0,
+        width: int = 0,
+        height: int = 0,
+        capture_ts_us: Optional[int] = None,
+        robot_id: Optional[str] = None
+) -> bytes:
+    """Build a v1 frame (client side; also used by tools and the simulator)."""
+    rid = robot_id.encode("utf-8") if robot_id else b""
+    if len(rid) > 255:
+        raise ValueError("robot_id must be at most 255 bytes")
+    if capture_ts_us is None:
+        capture_ts_us = time.time_ns() // 1000
+    header = _HEADER.pack(
+        FRAME_VERSION, int(codec), len(rid), 0, seq & 0xFFFFFFFF, capture_ts_us, width, height, len(data)
+    )
+    return FRAME_MAGIC + header + rid + data
+
+
+def encode_legacy_frame(data: bytes) -> bytes:
+    return len(data).to_bytes(LENGTH_PREFIX_BYTES, "big") + data
+
+
+async def read_frame(reader: asyncio.StreamReader) -> ImageMessage:
+    """Read one frame of either flavour and parse it into an ImageMessage.
+
+    Raises asyncio.IncompleteReadError when the client disconnects and
+    ProtocolError on malformed input.
+    """
+    prefix = await reader.readexactly(LENGTH_PREFIX_BYTES)
+    if prefix != FRAME_MAGIC:
+        length = int.from_bytes(prefix, "big")
+        if length <= 0 or length > MAX_FRAME_BYTES:
+            raise ProtocolError(f"invalid length {length}")
+        data = await reader.readexactly(length)
+        return ImageMessage(content_type=CONTENT_TYPES[Codec.JPEG], data=data)
+
+    header = parse_header(await reader.readexactly(_HEADER.size))
+    robot_id = None
+    if header.robot_id_len:
+        robot_id = (await reader.readexactly(header.robot_id_len)).decode("utf-8", errors="replace")
+    data = await reader.readexactly(header.payload_len)
+    return ImageMessage(
+        content_type=CONTENT_TYPES[header.codec],
+        data=data,
+        width=header.width or None,
+        height=header.height or None,
+        timestamp_ms=header.capture_ts_us // 1000 if header.capture_ts_us else None,
+        seq=header.seq,
+        robot_id=robot_id,
+        version=header.version,
+    )
+
+
+# -------------------------
+# Inference worker messages (dispatcher <-> worker)
+# -------------------------
+# 8-byte header (JSON length, payload length), UTF-8 JSON object, raw payload.
+_WORKER_HEADER = struct.Struct(">II")
+MAX_WORKER_JSON_BYTES = 16 * 1024 * 1024
+
+
+def encode_message(header: Dict[str, Any], payload: bytes = b"") -> bytes:
+    body = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return _WORKER_HEADER.pack(len(body), len(payload)) + body + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes]:
+    json_len, payload_len = _WORKER_HEADER.unpack(await reader.readexactly(_WORKER_HEADER.size))
+    if json_len > MAX_WORKER_JSON_BYTES or payload_len > MAX_FRAME_BYTES:
+        raise ProtocolError(f"worker message too large ({json_len}, {payload_len})")
+    header = json.loads((await reader.readexactly(json_len)).decode("utf-8"))
+    if not isinstance(header, dict) or "type" not in header:
+        raise ProtocolError("worker message must be a JSON object with a 'type' field")
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+
+@dataclass(frozen=True)
+class QualityHint:
+    """Capture settings the server asks the camera client to use."""
+    fps: float
+    width: int
+    height: int
+    jpeg_quality: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def encode_control(msg_type: str, body: Dict[str, Any]) -> bytes:
+    """Serialize a server -> client control message."""
+    data = json.dumps({"type": msg_type, **body}, separators=(",", ":")).encode("utf-8")
+    return len(data).to_bytes(LENGTH_PREFIX_BYTES, "big") + data
+
+
+def encode_quality_hint(hint: QualityHint) -> bytes:
+    return encode_control(CONTROL_QUALITY, hint.to_dict())
+
+
+def decode_control(data: bytes) -> Dict[str, Any]:
+    """Parse the JSON body of a control message (without its length prefix)."""
+    msg = json.loads(data.decode("utf-8"))
+    if not isinstance(msg, dict) or "type" not in msg:
+        raise ValueError("control message must be a JSON object with a 'type' field")
+    return msg
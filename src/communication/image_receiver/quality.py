@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from src.communication.image_receiver.protocols import QualityHint
+from src.core.config import AppConfig
+from src.core.events import EventBus, Priority
+from src.core.logging import logger
+
+
+class QualityGovernor:
+    """Derives a QualityHint for camera clients from the server's load.
+
+    Two signals are used:
+      - perception lane depth: frames waiting to be processed (backlog)
+      - inference latency: how many frames per second we can actually consume
+
+    The frame rate follows the measured latency, while resolution and JPEG
+    quality step down one level at a time when a backlog builds up and step
+    back up after the queue has stayed short for a while (hysteresis).
+    """
+
+    # (resolution scale, jpeg quality), from best to cheapest
+    LEVELS = ((1.0, 80), (0.75, 70), (0.5, 60), (0.5, 45))
+
+    def __init__(
+            self,
+            cfg: AppConfig,
+            bus: EventBus,
+            latency_source: Callable[[], Optional[float]] | None = None,
+            high_watermark: int = 4,
+            low_watermark: int = 1,
+            recover_after: int = 10,
+            min_fps: float = 1.0,
+            headroom: float = 0.8
+    ) -> None:
+        self._bus = bus
+        self._latency_source = latency_source
+        self._width = int(cfg.img_width)
+        self._height = int(cfg.img_height)
+        self._max_fps = float(cfg.quality_max_fps)
+        self._min_fps = min_fps
+        self._headroom = headroom
+        self._high = high_watermark
+        self._low = low_watermark
+        self._recover_after = recover_after
+
+        self._level = 0
+        self._calm = 0
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def update(self) -> QualityHint:
+        """Sample the load signals and return the hint for the next frames."""
+        depth = self._bus.qsize(Priority.PERCEPTION)
+        latency = self._latency_source() if self._latency_source else None
+
+        fps = self._max_fps
+        if latency and latency > 0:
+            fps = min(fps, self._headroom / latency)
+
+        if depth >= self._high:
+            self._calm = 0
+            if self._level < len(self.LEVELS) - 1:
+                self._set_level(self._level + 1, depth, latency)
+        elif depth <= self._low and fps >= self._min_fps:
+            self._calm += 1
+            if self._calm >= self._recover_after and self._level > 0:
+                self._calm = 0
+                self._set_level(self._level - 1, depth, latency)
+        else:
+            self._calm = 0
+
+        # While backlogged, ask for fewer frames than we can consume so the queue drains
+        if depth >= self._high:
+            fps *= 0.5
+        fps = max(self._min_fps, min(self._max_fps, fps))
+
+        scale, jpeg_quality = self.LEVELS[self._level]
+        return QualityHint(
+            fps=round(fps, 1),
+            width=self._even(self._width * scale),
+            height=self._even(self._height * scale),
+            jpeg_quality=jpeg_quality,
+        )
+
+    def _set_level(self, level: int, depth: int, latency: Optional[float]) -> None:
+        lat_ms = f"{latency * 1000:.0f}ms" if latency else "n/a"
+        logger.info(f"[QualityGovernor] level {self._level} -> {level} (queue={depth}, latency={lat_ms})")
+        self._level = level
+
+    @staticmethod
+    def _even(value: float) -> int:
+        return max(2, int(value) // 2 * 2)
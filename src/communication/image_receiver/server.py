@@ -1,20 +1,40 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any
-
+import time
+
+from src.communication.image_receiver.protocols import (
+    ProtocolError,
+    QualityHint,
+    encode_quality_hint,
+    read_frame,
+)
+from src.communication.image_receiver.quality import QualityGovernor
 from src.core.config import AppConfig
 from src.core.events import EventBus, Event
 from src.core.logging import logger
 
 
 class ImageServer:
-    """Async TCP server that receives JPEG bytes and publishes image_received events."""
+    """Async TCP server that receives frames and publishes image_received events.
+
+    Both legacy length-prefixed JPEG clients and v1 header clients are accepted
+    (see protocols.py); the payload carries the parsed ImageMessage.
+
+    If a QualityGovernor is given (and cfg.quality_feedback is on), the server also
+    writes quality hints back to the client on the same connection.
+    """
 
-    def __init__(self, cfg: AppConfig, bus: EventBus) -> None:
+    # Stop writing hints if the client is not reading them
+    MAX_PENDING_CONTROL_BYTES = 16 * 1024
+
+    def __init__(self, cfg: AppConfig, bus: EventBus, governor: QualityGovernor | None = None) -> None:
         self._cfg = cfg
         self._bus = bus
         self._server: asyncio.AbstractServer | None = None
+        self._governor = governor if getattr(cfg, "quality_feedback", False) else None
+        self._hint_interval = float(getattr(cfg, "quality_interval_s", 2.0))
+        self.stats = {"frames": 0, "seq_gaps": 0, "frames_missing": 0, "seq_resets": 0}
 
     # -------------------------
     # Context manager
@@ -45,34 +65,82 @@ class ImageServer:
             await self._server.wait_closed()
             logger.info("[ImageServer] stopped")
 
+    # -------------------------
+    # Sequence tracking
+    # -------------------------
+    def _track_seq(self, addr, last_seq: int | None, seq: int) -> None:
+        if last_seq is None:
+            return
+        expected = (last_seq + 1) & 0xFFFFFFFF
+        if seq == expected:
+            return
+        missing = (seq - expected) & 0xFFFFFFFF
+        if missing < 0x80000000:
+            self.stats["seq_gaps"] += 1
+            self.stats["frames_missing"] += missing
+            logger.debug(f"[ImageServer] {addr}: {missing} frame(s) missing before seq {seq}")
+        else:
+            # Went backwards: client restarted its counter
+            self.stats["seq_resets"] += 1
+            logger.info(f"[ImageServer] {addr}: sequence restarted at {seq}")
+
+    # -------------------------
+    # Upstream control
+    # -------------------------
+    def _send_hint(self, writer: asyncio.StreamWriter, hint: QualityHint) -> bool:
+        """Queue a quality hint without ever blocking the receive loop."""
+        transport = writer.transport
+        if transport is None or transport.is_closing():
+            return False
+        if transport.get_write_buffer_size() > self.MAX_PENDING_CONTROL_BYTES:
+            return False
+        writer.write(encode_quality_hint(hint))
+        return True
+
     # -------------------------
     # Client handler
     # -------------------------
     async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         addr = writer.get_extra_info("peername")
         logger.info(f"[ImageServer] Client connected: {addr}")
+        last_hint: QualityHint | None = None
+        last_hint_at = 0.0
+        last_seq: int | None = None
 
         try:
             while True:
                 await asyncio.sleep(0.2)
-                # 1) read 4-byte big-endian length prefix
-                header = await reader.readexactly(4)
-                length = int.from_bytes(header, "big")
-
-                if length <= 0:
-                    logger.warning(f"[ImageServer] Invalid length {length} from client {addr}")
+                # 1) read one frame (legacy length-prefixed JPEG or v1 header)
+                try:
+                    message = await read_frame(reader)
+                except ProtocolError as e:
+                    logger.warning(f"[ImageServer] Bad frame from client {addr}: {e}")
                     break
+                self.stats["frames"] += 1
 
-                # 2) read image data
-                data = await reader.readexactly(length)
-                # logger.info(f"[ImageServer] Received {length} bytes from client {addr}")
+                # 2) detect frames the client sent but we never got
+                if message.seq is not None:
+                    self._track_seq(addr, last_seq, message.seq)
+                    last_seq = message.seq
 
                 # 3) publish event
                 await self._bus.publish(Event(
                     type="image_received",
-                    payload={"bytes": data, "from": addr}
+                    payload={
+                        "bytes": message.data,
+                        "from": addr,
+                        "message": message,
+                        "received_at": time.monotonic(),
+                    }
                 ))
-                
+
+                # 4) tell the client how much we can actually handle
+                if self._governor is not None:
+                    hint = self._governor.update()
+                    now = time.monotonic()
+                    if hint != last_hint or now - last_hint_at >= self._hint_interval:
+                        if self._send_hint(writer, hint):
+                            last_hint, last_hint_at = hint, now
 
         except asyncio.IncompleteReadError:
             logger.info(f"[ImageServer] Client disconnected: {addr}")
@@ -1,86 +1,225 @@
 from __future__ import annotations
 
-import socket
+import asyncio
 import json
 import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
 from src.core.config import AppConfig
 from src.core.events import EventBus, Event
 from src.core.logging import logger
+from src.core.metrics import percentiles
 
 
-class Controller:
-    """PC端控制器：長連線版本"""
+@dataclass(frozen=True)
+class RobotEndpoint:
+    robot_id: str
+    host: str
+    port: int
 
-    def __init__(self, cfg: AppConfig, bus: EventBus) -> None:
-        self._cfg = cfg
-        self._bus = bus
-        self._sock: socket.socket | None = None
-        self._jetbot = "172.20.10.9"
-        self._port = 8081
 
-    async def __aenter__(self) -> "Controller":
-        self._bus.subscribe("drive/set_velocity", self._apply_velocity)
-        logger.info("✅ Controller (persistent mode) started")
-        return self
+def parse_robots(spec: str) -> List[RobotEndpoint]:
+    """Parse `id=host:port,id2=host:port`; an entry without `id=` is called 'default'."""
+    robots: List[RobotEndpoint] = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        robot_id, _, address = entry.rpartition("=")
+        host, _, port = address.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"invalid robot address {entry!r}, expected id=host:port")
+        robots.append(RobotEndpoint(robot_id or "default", host, int(port)))
+    return robots
 
-    async def __aexit__(self, exc_type, exc, tb) -> None:
-        self._close()
-        logger.info("[Controller] stopped")
+
+class RobotLink:
+    """Persistent connection to one JetBot with its own bounded queue and writer task.
+
+    submit() never blocks: when the queue is full the oldest command is dropped,
+    since only the latest velocity matters. For the same reason the writer only
+    sends the newest queued command and skips the rest. Connection attempts and
+    writes happen in the writer task, so a slow or dead robot only delays its own
+    commands.
+    """
+
+    def __init__(
+            self,
+            endpoint: RobotEndpoint,
+            queue_size: int = 4,
+            connect_timeout: float = 3.0,
+            write_timeout: float = 1.0,
+            max_retry_delay: float = 5.0
+    ) -> None:
+        self.endpoint = endpoint
+        self._queue: "asyncio.Queue[Tuple[float, dict]]" = asyncio.Queue(maxsize=queue_size)
+        self._connect_timeout = connect_timeout
+        self._write_timeout = write_timeout
+        self._max_retry_delay = max_retry_delay
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+
+        self._latencies: Deque[float] = deque(maxlen=512)
+        self.sent = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.failures = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"jetbot-{self.endpoint.robot_id}")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        # Best effort: leave the robot standing still
+        if self._writer is not None:
+            try:
+                await self._write({"left": 0.0, "right": 0.0})
+            except Exception:
+                pass
+        await self._close()
+
+    def submit(self, cmd: dict) -> None:
+        item = (time.monotonic(), cmd)
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    def stats(self) -> Dict[str, float]:
+        out = percentiles([lat * 1000.0 for lat in self._latencies])
+        out.update(
+            connected=int(self.connected), sent=self.sent, dropped=self.dropped,
+            reconnects=self.reconnects, failures=self.failures, queued=self._queue.qsize(),
+        )
+        return out
 
     # =======================
-    # Connection management
+    # Writer task
     # =======================
-    def _connect(self) -> None:
-        """建立或重建連線"""
-        if self._sock is not None:
-            return
-
+    async def _run(self) -> None:
+        pending: Optional[Tuple[float, dict]] = None
         while True:
+            await self._connect()
+            if pending is None:
+                pending = await self._queue.get()
+            # Only the latest velocity matters: skip anything superseded while
+            # we were connecting or writing
+            while not self._queue.empty():
+                pending = self._queue.get_nowait()
+                self.dropped += 1
+            submitted_at, cmd = pending
             try:
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.settimeout(3)
-                logger.info(f"🔌 Connecting to JetBot {self._jetbot}:{self._port} ...")
-                s.connect((self._jetbot, self._port))
-                s.settimeout(None)
-                self._sock = s
-                logger.info("✅ Connected to JetBot")
-                break
+                await self._write(cmd)
             except Exception as e:
-                logger.error(f"❌ Connect failed: {e}")
-                time.sleep(1)
+                logger.error(f"❌ [{self.endpoint.robot_id}] Send failed: {e}")
+                self.failures += 1
+                await self._close()
+                # Retried after reconnecting unless a newer command arrives meanwhile
+                continue
+            pending = None
+            self.sent += 1
+            self._latencies.append(time.monotonic() - submitted_at)
 
-    def _close(self) -> None:
-        if self._sock:
+    async def _connect(self) -> None:
+        """建立或重建連線 (retries with backoff until it succeeds)"""
+        delay = 0.5
+        ep = self.endpoint
+        while self._writer is None:
             try:
-                self._sock.close()
+                logger.info(f"🔌 Connecting to JetBot {ep.robot_id} at {ep.host}:{ep.port} ...")
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(ep.host, ep.port), timeout=self._connect_timeout
+                )
+                self._writer = writer
+                if self.sent or self.failures:
+                    self.reconnects += 1
+                logger.info(f"✅ Connected to JetBot {ep.robot_id}")
+            except Exception as e:
+                logger.error(f"❌ [{ep.robot_id}] Connect failed: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(self._max_retry_delay, delay * 2)
+
+    async def _write(self, cmd: dict) -> None:
+        # 加換行，避免黏包問題
+        msg = json.dumps(cmd) + "\n"
+        self._writer.write(msg.encode())
+        await asyncio.wait_for(self._writer.drain(), timeout=self._write_timeout)
+
+    async def _close(self) -> None:
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
             except Exception:
                 pass
-            self._sock = None
+
+
+class Controller:
+    """PC端控制器：每台 JetBot 一條長連線 (one persistent connection per robot).
+
+    drive/set_velocity events are routed by payload["robot_id"]; events without
+    one go to the first configured robot.
+    """
+
+    def __init__(self, cfg: AppConfig, bus: EventBus) -> None:
+        self._cfg = cfg
+        self._bus = bus
+        robots = parse_robots(cfg.jetbots)
+        if not robots:
+            raise ValueError("no JetBot configured (JETBOTS)")
+        self._links: Dict[str, RobotLink] = {r.robot_id: RobotLink(r, queue_size=cfg.jetbot_queue_size) for r in robots}
+        self._default_robot = robots[0].robot_id
+        self._unknown: set[str] = set()
+
+    async def __aenter__(self) -> "Controller":
+        for link in self._links.values():
+            link.start()
+        self._bus.subscribe("drive/set_velocity", self._apply_velocity)
+        logger.info(f"✅ Controller (persistent mode) started for {sorted(self._links)}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await asyncio.gather(*(link.stop() for link in self._links.values()), return_exceptions=True)
+        for robot_id, stats in self.stats().items():
+            logger.info(
+                f"[Controller] {robot_id}: sent={stats['sent']} dropped={stats['dropped']} "
+                f"reconnects={stats['reconnects']} p95={stats['p95']:.1f}ms"
+            )
+        logger.info("[Controller] stopped")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-robot send latency (ms), reconnect and drop counts."""
+        return {robot_id: link.stats() for robot_id, link in self._links.items()}
 
     # =======================
     # Send command
     # =======================
     def _apply_velocity(self, event: Event) -> None:
         data = event.payload or {}
+        robot_id = data.get("robot_id") or self._default_robot
+        link = self._links.get(robot_id)
+        if link is None:
+            if robot_id not in self._unknown:
+                self._unknown.add(robot_id)
+                logger.warning(f"[Controller] No JetBot configured for robot_id {robot_id!r}")
+            return
+
         left = float(data.get("left", 0.0))
         right = float(data.get("right", 0.0))
 
         left = max(-1.0, min(1.0, left))
         right = max(-1.0, min(1.0, right))
 
-        cmd = {"left": left, "right": right}
-        self._send(cmd)
-
-    def _send(self, cmd: dict) -> None:
-        try:
-            if self._sock is None:
-                self._connect()
-
-            # 加換行，避免黏包問題
-            msg = json.dumps(cmd) + "\n"
-            self._sock.sendall(msg.encode())
-            # logger.info(f"🎮 Sent: {msg.strip()}")
-
-        except Exception as e:
-            logger.error(f"❌ Send failed: {e}")
-            self._close()
+        link.submit({"left": left, "right": right})
@@ -21,6 +21,13 @@ except Exception:  # pragma: no cover
 import os
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return bool(default)
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class AppConfig(BaseModel):
     app_host: str = "0.0.0.0"
     app_port: int = 8080
@@ -29,8 +36,56 @@ class AppConfig(BaseModel):
     worker_threads: int = 2
     img_height = 480
     img_width = 640
-    yolo_model: str = "best.pt"
+    yolo_model: str = "yolov8s.pt"
     yolo_device: str = "cpu"
+    yolo_imgsz: int = 640
+    # Skip the ultralytics predictor pipeline: reused letterbox buffers + direct model call + NMS
+    yolo_lean: bool = False
+    # ROI mode: infer on a padded crop around the last target, full frame when lost
+    yolo_roi: bool = False
+    yolo_roi_padding: float = 1.0  # padding on each side, in box sizes
+    yolo_roi_imgsz: int = 0  # model input size for crops (0 = yolo_imgsz)
+    yolo_roi_refresh: int = 30  # force a full-frame pass after this many ROI frames
+    # Extra model files to load at startup so switching to them is instant (comma separated)
+    yolo_preload: str = ""
+    # Memory budget for cached models; least recently used idle models are evicted (0 = unlimited)
+    model_cache_mb: float = 0.0
+    # Remote inference workers (python -m src.perception.worker), host:port comma separated;
+    # empty = infer in this process
+    inference_workers: str = ""
+    inference_timeout_s: float = 2.0
+
+    # JetBots to drive: id=host:port, comma separated (first one is the default robot)
+    jetbots: str = "default=172.20.10.9:8081"
+    jetbot_queue_size: int = 4
+
+    # Upstream quality hints sent back to the camera client (opt-in)
+    quality_feedback: bool = False
+    quality_max_fps: float = 5.0
+    quality_interval_s: float = 2.0
+
+    # Frames older than this are dropped before decode/inference (0 disables)
+    frame_max_age_ms: float = 0.0
+    frame_age_reference: str = "receive"  # receive|capture
+
+    # EventBus lane scheduling: strict|weighted
+    bus_scheduling: str = "strict"
+
+    # MJPEG preview of annotated frames (port 0 disables)
+    preview_host: str = "127.0.0.1"
+    preview_port: int = 0
+    preview_fps: float = 5.0
+    preview_jpeg_quality: int = 70
+
+    # On-demand sampling profiler (SIGUSR1 or control socket; port 0 = no socket)
+    profile_dir: str = "profiles"
+    profile_seconds: float = 10.0
+    profile_interval_ms: float = 5.0
+    profile_control_port: int = 0
+
+    # Event-loop lag watchdog
+    loop_watchdog: bool = True
+    loop_lag_threshold_ms: float = 100.0
 
     @classmethod
     def load(cls) -> "AppConfig":
@@ -42,10 +97,38 @@ class AppConfig(BaseModel):
             app_port=int(os.getenv("APP_PORT", getattr(cls, 'app_port', 8080))),
             transport=os.getenv("TRANSPORT", getattr(cls, 'transport', "tcp")),
             worker_threads=int(os.getenv("WORKER_THREADS", getattr(cls, 'worker_threads', 2))),
-            yolo_model=os.getenv("YOLO_MODEL", getattr(cls, 'yolo_model', "best.pt")),
+            yolo_model=os.getenv("YOLO_MODEL", getattr(cls, 'yolo_model', "yolov8s.pt")),
             yolo_device=os.getenv("YOLO_DEVICE", getattr(cls, 'yolo_device', "cpu")),
-            img_height=os.getenv("IMG_HEIGHT", getattr(cls, 'img_height', 480)),
-            img_width=os.getenv("IMG_WIDTH", getattr(cls, 'img_width', 640)),
+            yolo_imgsz=int(os.getenv("YOLO_IMGSZ", getattr(cls, 'yolo_imgsz', 640))),
+            yolo_lean=_env_bool("YOLO_LEAN", getattr(cls, 'yolo_lean', False)),
+            yolo_roi=_env_bool("YOLO_ROI", getattr(cls, 'yolo_roi', False)),
+            yolo_roi_padding=float(os.getenv("YOLO_ROI_PADDING", getattr(cls, 'yolo_roi_padding', 1.0))),
+            yolo_roi_imgsz=int(os.getenv("YOLO_ROI_IMGSZ", getattr(cls, 'yolo_roi_imgsz', 0))),
+            yolo_roi_refresh=int(os.getenv("YOLO_ROI_REFRESH", getattr(cls, 'yolo_roi_refresh', 30))),
+            yolo_preload=os.getenv("YOLO_PRELOAD", getattr(cls, 'yolo_preload', "")),
+            model_cache_mb=float(os.getenv("MODEL_CACHE_MB", getattr(cls, 'model_cache_mb', 0.0))),
+            inference_workers=os.getenv("INFERENCE_WORKERS", getattr(cls, 'inference_workers', "")),
+            inference_timeout_s=float(os.getenv("INFERENCE_TIMEOUT_S", getattr(cls, 'inference_timeout_s', 2.0))),
+            img_height=int(os.getenv("IMG_HEIGHT", getattr(cls, 'img_height', 480))),
+            img_width=int(os.getenv("IMG_WIDTH", getattr(cls, 'img_width', 640))),
+            jetbots=os.getenv("JETBOTS", getattr(cls, 'jetbots', "default=172.20.10.9:8081")),
+            jetbot_queue_size=int(os.getenv("JETBOT_QUEUE_SIZE", getattr(cls, 'jetbot_queue_size', 4))),
+            quality_feedback=_env_bool("QUALITY_FEEDBACK", getattr(cls, 'quality_feedback', False)),
+            quality_max_fps=float(os.getenv("QUALITY_MAX_FPS", getattr(cls, 'quality_max_fps', 5.0))),
+            quality_interval_s=float(os.getenv("QUALITY_INTERVAL_S", getattr(cls, 'quality_interval_s', 2.0))),
+            frame_max_age_ms=float(os.getenv("FRAME_MAX_AGE_MS", getattr(cls, 'frame_max_age_ms', 0.0))),
+            frame_age_reference=os.getenv("FRAME_AGE_REFERENCE", getattr(cls, 'frame_age_reference', "receive")),
+            bus_scheduling=os.getenv("BUS_SCHEDULING", getattr(cls, 'bus_scheduling', "strict")),
+            preview_host=os.getenv("PREVIEW_HOST", getattr(cls, 'preview_host', "127.0.0.1")),
+            preview_port=int(os.getenv("PREVIEW_PORT", getattr(cls, 'preview_port', 0))),
+            preview_fps=float(os.getenv("PREVIEW_FPS", getattr(cls, 'preview_fps', 5.0))),
+            preview_jpeg_quality=int(os.getenv("PREVIEW_JPEG_QUALITY", getattr(cls, 'preview_jpeg_quality', 70))),
+            profile_dir=os.getenv("PROFILE_DIR", getattr(cls, 'profile_dir', "profiles")),
+            profile_seconds=float(os.getenv("PROFILE_SECONDS", getattr(cls, 'profile_seconds', 10.0))),
+            profile_interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", getattr(cls, 'profile_interval_ms', 5.0))),
+            profile_control_port=int(os.getenv("PROFILE_CONTROL_PORT", getattr(cls, 'profile_control_port', 0))),
+            loop_watchdog=_env_bool("LOOP_WATCHDOG", getattr(cls, 'loop_watchdog', True)),
+            loop_lag_threshold_ms=float(os.getenv("LOOP_LAG_THRESHOLD_MS", getattr(cls, 'loop_lag_threshold_ms', 100.0))),
         )
         try:
             return cls(**kwargs)  # type: ignore[arg-type]
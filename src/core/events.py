@@ -1,8 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import Any, Callable, Dict, List
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.core.logging import logger
+from src.core.metrics import percentiles
 
 
 @dataclass
@@ -11,37 +17,153 @@ class Event:
     payload: Dict[str, Any]
 
 
+class Priority(IntEnum):
+    """Dispatch lanes; lower value = more important."""
+    CONTROL = 0
+    PERCEPTION = 1
+    DIAGNOSTICS = 2
+
+
+# Event type prefix -> lane; anything else goes to PERCEPTION
+DEFAULT_PRIORITIES: Dict[str, Priority] = {
+    "drive/": Priority.CONTROL,
+    "diagnostics/": Priority.DIAGNOSTICS,
+}
+
+DEFAULT_WEIGHTS: Dict[Priority, float] = {
+    Priority.CONTROL: 8.0,
+    Priority.PERCEPTION: 4.0,
+    Priority.DIAGNOSTICS: 1.0,
+}
+
+
+@dataclass
+class _Lane:
+    priority: Priority
+    queue: "asyncio.Queue[Tuple[float, Event]]" = field(default_factory=asyncio.Queue)
+    waits: Deque[float] = field(default_factory=lambda: deque(maxlen=1024))
+    dispatched: int = 0
+    errors: int = 0
+    credit: float = 0.0
+    task: Optional[asyncio.Task] = None
+
+
 class EventBus:
-    """A tiny async pub/sub bus for decoupling modules."""
+    """A tiny async pub/sub bus for decoupling modules.
 
-    def __init__(self) -> None:
+    Events are sorted into priority lanes (control > perception > diagnostics),
+    each dispatched by its own task, so a slow perception handler (e.g. one
+    awaiting YOLO inference) never holds up motor commands. Between lanes:
+      - strict:   a lane only starts an event when all higher lanes are empty
+      - weighted: while higher lanes are backlogged, a lane still gets a share
+                  of dispatches proportional to its weight
+    """
+
+    def __init__(self, scheduling: str = "strict", weights: Dict[Priority, float] | None = None) -> None:
+        if scheduling not in ("strict", "weighted"):
+            raise ValueError(f"scheduling must be 'strict' or 'weighted', got {scheduling!r}")
+        self._scheduling = scheduling
+        self._weights = {**DEFAULT_WEIGHTS, **(weights or {})}
         self._subscribers: Dict[str, List[Callable[[Event], Any]]] = {}
-        self._queue: "asyncio.Queue[Event]" = asyncio.Queue()
-        self._task: asyncio.Task | None = None
+        self._priorities: Dict[str, Priority] = {}
+        self._lanes: Dict[Priority, _Lane] = {p: _Lane(p) for p in Priority}
+        self._changed = asyncio.Condition()
 
     async def __aenter__(self) -> "EventBus":
-        self._task = asyncio.create_task(self._run())
+        for lane in self._lanes.values():
+            lane.task = asyncio.create_task(self._run(lane))
         return self
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
+        for lane in self._lanes.values():
+            if lane.task:
+                lane.task.cancel()
+                try:
+                    await lane.task
+                except asyncio.CancelledError:
+                    pass
 
     def subscribe(self, event_type: str, callback: Callable[[Event], Any]) -> None:
         self._subscribers.setdefault(event_type, []).append(callback)
 
-    async def publish(self, event: Event) -> None:
-        await self._queue.put(event)
+    def set_priority(self, event_type: str, priority: Priority) -> None:
+        """Route an event type to a lane, overriding DEFAULT_PRIORITIES."""
+        self._priorities[event_type] = priority
+
+    def priority_for(self, event_type: str) -> Priority:
+        priority = self._priorities.get(event_type)
+        if priority is not None:
+            return priority
+        for prefix, p in DEFAULT_PRIORITIES.items():
+            if event_type.startswith(prefix):
+                return p
+        return Priority.PERCEPTION
+
+    async def publish(self, event: Event, priority: Priority | None = None) -> None:
+        if priority is None:
+            priority = self.priority_for(event.type)
+        await self._lanes[priority].queue.put((time.monotonic(), event))
+        async with self._changed:
+            self._changed.notify_all()
+
+    def qsize(self, priority: Priority | None = None) -> int:
+        """Number of events waiting to be dispatched (one lane or all)."""
+        if priority is not None:
+            return self._lanes[priority].queue.qsize()
+        return sum(lane.queue.qsize() for lane in self._lanes.values())
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        """Number of callbacks per event type."""
+        return {event_type: len(callbacks) for event_type, callbacks in self._subscribers.items()}
 
-    async def _run(self) -> None:
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-lane depth, dispatch counts and queueing delay percentiles (ms)."""
+        out: Dict[str, Dict[str, float]] = {}
+        for p, lane in self._lanes.items():
+            lane_stats = percentiles([w * 1000.0 for w in lane.waits])
+            lane_stats.update(depth=lane.queue.qsize(), dispatched=lane.dispatched, errors=lane.errors)
+            out[p.name.lower()] = lane_stats
+        return out
+
+    # -------------------------
+    # Dispatch
+    # -------------------------
+    async def _run(self, lane: _Lane) -> None:
         while True:
-            event = await self._queue.get()
-            for cb in list(self._subscribers.get(event.type, [])):
+            enqueued_at, event = await lane.queue.get()
+            await self._wait_turn(lane)
+            lane.waits.append(time.monotonic() - enqueued_at)
+            lane.dispatched += 1
+            await self._dispatch(lane, event)
+            await self._dispatched(lane)
+
+    async def _dispatch(self, lane: _Lane, event: Event) -> None:
+        for cb in list(self._subscribers.get(event.type, [])):
+            try:
                 res = cb(event)
                 if asyncio.iscoroutine(res):
                     await res
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                lane.errors += 1
+                logger.exception(f"[EventBus] handler {getattr(cb, '__qualname__', cb)} failed on '{event.type}'")
+
+    async def _wait_turn(self, lane: _Lane) -> None:
+        higher = [self._lanes[p] for p in Priority if p < lane.priority]
+        if not higher:
+            return
+        async with self._changed:
+            while any(h.queue.qsize() for h in higher):
+                if self._scheduling == "weighted" and lane.credit >= 1.0:
+                    lane.credit -= 1.0
+                    return
+                await self._changed.wait()
 
+    async def _dispatched(self, lane: _Lane) -> None:
+        if self._scheduling == "weighted":
+            for p, lower in self._lanes.items():
+                if p > lane.priority:
+                    lower.credit = min(1.0, lower.credit + self._weights[p] / self._weights[lane.priority])
+        async with self._changed:
+            self._changed.notify_all()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable
+
+
+def percentiles(samples: Iterable[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles of a sample collection (empty -> zeros)."""
+    data = sorted(samples)
+    out: Dict[str, float] = {}
+    for p in points:
+        if not data:
+            out[f"p{p}"] = 0.0
+            continue
+        idx = min(len(data) - 1, max(0, int(round(p / 100.0 * len(data))) - 1))
+        out[f"p{p}"] = data[idx]
+    out["max"] = data[-1] if data else 0.0
+    return out
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import AbstractAsyncContextManager
+from typing import Dict, List, Optional, Tuple
+
+from src.core.logging import logger
+
+# Source file -> component name used in the per-module summary
+COMPONENTS: Dict[str, str] = {
+    os.path.join("image_receiver", "server.py"): "ImageServer",
+    os.path.join("perception", "yolo_inference.py"): "YoloInference",
+    os.path.join("perception", "model_registry.py"): "YoloInference",
+    os.path.join("task_manager", "motor_controller.py"): "Commander",
+    os.path.join("jetbot_api", "controller.py"): "Controller",
+}
+
+
+class SamplingProfiler:
+    """Samples the stacks of all Python threads for a fixed window.
+
+    Nothing runs until start() is called, so it costs nothing while idle.
+    A run writes two files to `output_dir`:
+      - <stamp>.collapsed: one `thread;frame;...;frame count` line per unique
+        stack, ready for flamegraph.pl / speedscope
+      - <stamp>.summary.txt: samples per thread, per component (inclusive)
+        and per module (self time)
+    """
+
+    def __init__(self, output_dir: str = "profiles", interval_ms: float = 5.0, duration_s: float = 10.0) -> None:
+        self._output_dir = output_dir
+        self._interval = interval_ms / 1000.0
+        self._duration = duration_s
+        self._thread: Optional[threading.Thread] = None
+        self.last_output: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration_s: float | None = None) -> bool:
+        """Begin a sampling window; returns False if one is already running."""
+        duration = self._duration if duration_s is None else duration_s
+        if not 0 < duration < float("inf"):
+            raise ValueError(f"duration must be a positive number of seconds, got {duration_s!r}")
+        if self.running:
+            return False
+        self._thread = threading.Thread(target=self._run, args=(duration,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"[Profiler] sampling for {duration:.1f}s every {self._interval * 1000:.0f}ms")
+        return True
+
+    # -------------------------
+    # Sampling
+    # -------------------------
+    def _run(self, duration: float) -> None:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                stacks[(names.get(tid, str(tid)),) + self._walk(frame)] += 1
+            samples += 1
+            time.sleep(self._interval)
+        try:
+            self.last_output = self._write(stacks, samples, duration)
+            logger.info(f"[Profiler] wrote {self.last_output}.collapsed and .summary.txt ({samples} samples)")
+        except OSError as e:
+            logger.error(f"[Profiler] failed to write profile: {e}")
+
+    @staticmethod
+    def _walk(frame) -> Tuple[str, ...]:
+        out: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            out.append(f"{module}:{code.co_name}:{code.co_filename}")
+            frame = frame.f_back
+        out.reverse()  # root first
+        return tuple(out)
+
+    # -------------------------
+    # Output
+    # -------------------------
+    def _write(self, stacks: Counter, samples: int, duration: float) -> str:
+        os.makedirs(self._output_dir, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("profile-%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        # Exclusive create, so captures finishing in the same millisecond never overwrite each other
+        for attempt in range(100):
+            base = os.path.join(self._output_dir, stamp + (f"-{attempt}" if attempt else ""))
+            try:
+                collapsed = open(base + ".collapsed", "x", encoding="utf-8")
+                break
+            except FileExistsError:
+                continue
+        else:
+            raise FileExistsError(f"no free profile name for {stamp} in {self._output_dir}")
+
+        with collapsed as f:
+            for stack, count in stacks.most_common():
+                frames = [stack[0]] + [self._short(fr) for fr in stack[1:]]
+                f.write(";".join(frames) + f" {count}\n")
+
+        per_thread: Counter = Counter()
+        per_component: Counter = Counter()
+        per_module: Counter = Counter()
+        for stack, count in stacks.items():
+            per_thread[stack[0]] += count
+            for component in {self._component(fr) for fr in stack[1:]} - {None}:
+                per_component[component] += count
+            if len(stack) > 1:
+                per_module[stack[-1].split(":", 1)[0]] += count
+
+        total = sum(stacks.values()) or 1
+        with open(base + ".summary.txt", "w", encoding="utf-8") as f:
+            f.write(f"window: {duration:.1f}s, {samples} sampling rounds, interval {self._interval * 1000:.1f}ms\n")
+            for title, counter in (
+                    ("threads", per_thread),
+                    ("components (inclusive)", per_component),
+                    ("modules (self)", per_module),
+            ):
+                f.write(f"\n== {title} ==\n")
+                for name, count in counter.most_common(30):
+                    f.write(f"{count:8d}  {100.0 * count / total:5.1f}%  {name}\n")
+        return base
+
+    @staticmethod
+    def _short(frame: str) -> str:
+        module, func, _ = frame.split(":", 2)
+        return f"{module}:{func}"
+
+    @staticmethod
+    def _component(frame: str) -> str | None:
+        filename = frame.split(":", 2)[2]
+        for suffix, component in COMPONENTS.items():
+            if filename.endswith(suffix):
+                return component
+        return None
+
+
+class ProfilerControl(AbstractAsyncContextManager):
+    """Lets an operator trigger SamplingProfiler runs on a live process.
+
+    - SIGUSR1 (where supported) starts a default-length window
+    - optional control socket on 127.0.0.1:<port>, one line per command:
+      `profile [seconds]` or `status`
+    """
+
+    def __init__(self, profiler: SamplingProfiler, control_port: int = 0, use_signal: bool = True) -> None:
+        self._profiler = profiler
+        self._port = control_port
+        self._use_signal = use_signal and hasattr(signal, "SIGUSR1")
+        self._signal_installed = False
+        self._server: asyncio.AbstractServer | None = None
+
+    async def __aenter__(self) -> "ProfilerControl":
+        loop = asyncio.get_running_loop()
+        if self._use_signal:
+            try:
+                loop.add_signal_handler(signal.SIGUSR1, self._profiler.start)
+                self._signal_installed = True
+                logger.info(f"[Profiler] send SIGUSR1 to pid {os.getpid()} to profile")
+            except (NotImplementedError, RuntimeError):
+                logger.warning("[Profiler] signal trigger not supported on this platform")
+        if self._port:
+            self._server = await asyncio.start_server(self._handle, "127.0.0.1", self._port)
+            logger.info(f"[Profiler] control socket on 127.0.0.1:{self._port}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._signal_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR1)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = (await reader.readline()).decode("utf-8", errors="replace").split()
+            reply = self._command(line)
+            writer.write((reply + "\n").encode("utf-8"))
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"[Profiler] control connection error: {e}")
+        finally:
+            writer.close()
+
+    def _command(self, args: List[str]) -> str:
+        if not args or args[0] == "status":
+            state = "running" if self._profiler.running else "idle"
+            return f"{state} last={self._profiler.last_output or '-'}"
+        if args[0] == "profile":
+            try:
+                duration = float(args[1]) if len(args) > 1 else None
+            except ValueError:
+                return "error: seconds must be a number"
+            if duration is not None and not 0 < duration < float("inf"):
+                return "error: seconds must be positive"
+            return "started" if self._profiler.start(duration) else "busy"
+        return "error: commands are 'profile [seconds]' and 'status'"
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import AbstractAsyncContextManager
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.core.logging import logger
+from src.core.metrics import percentiles
+
+
+class LoopWatchdog(AbstractAsyncContextManager):
+    """Measures asyncio scheduling lag and catches callbacks that block the loop.
+
+    A ticker task sleeps for `interval` and records how late it woke up. A
+    separate monitor thread notices when the ticker has not run for longer than
+    the threshold and grabs the loop thread's stack right then, i.e. while the
+    offending callback is still running. The stack is logged once the loop
+    recovers.
+    """
+
+    def __init__(
+            self,
+            interval: float = 0.05,
+            threshold_ms: float = 100.0,
+            report_interval_s: float = 60.0,
+            window: int = 2048,
+            keep_stalls: int = 20
+    ) -> None:
+        self._interval = interval
+        self._threshold = threshold_ms / 1000.0
+        self._report_interval = report_interval_s
+        self._lags: Deque[float] = deque(maxlen=window)
+        self.stalls: Deque[Tuple[float, str]] = deque(maxlen=keep_stalls)  # (lag_ms, stack)
+        self.over_threshold = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.monotonic()
+        self._captured: Optional[str] = None
+        self._lock = threading.Lock()
+
+    async def __aenter__(self) -> "LoopWatchdog":
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"[LoopWatchdog] started (threshold={self._threshold * 1000:.0f}ms)")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        logger.info(f"[LoopWatchdog] stopped; lag {self._format(self.snapshot())}")
+
+    # -------------------------
+    # Export
+    # -------------------------
+    def snapshot(self) -> Dict[str, float]:
+        """Lag percentiles in ms over the recent window."""
+        stats = percentiles([lag * 1000.0 for lag in self._lags])
+        stats["samples"] = len(self._lags)
+        stats["over_threshold"] = self.over_threshold
+        return stats
+
+    def recent_stalls(self) -> List[Tuple[float, str]]:
+        return list(self.stalls)
+
+    # -------------------------
+    # Internals
+    # -------------------------
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_report = loop.time() + self._report_interval
+        while True:
+            expected = loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            now = loop.time()
+            lag = max(0.0, now - expected)
+            self._last_tick = time.monotonic()
+            self._lags.append(lag)
+
+            if lag > self._threshold:
+                self.over_threshold += 1
+                with self._lock:
+                    stack, self._captured = self._captured, None
+                self.stalls.append((lag * 1000.0, stack or ""))
+                if stack:
+                    logger.warning(f"[LoopWatchdog] event loop blocked for {lag * 1000:.0f}ms in:\n{stack}")
+                else:
+                    logger.warning(f"[LoopWatchdog] event loop lagged {lag * 1000:.0f}ms")
+            elif self._captured is not None:
+                with self._lock:
+                    self._captured = None
+
+            if now >= next_report:
+                next_report = now + self._report_interval
+                logger.info(f"[LoopWatchdog] lag {self._format(self.snapshot())}")
+
+    def _monitor(self) -> None:
+        poll = max(0.005, self._threshold / 4)
+        while not self._stop.wait(poll):
+            stalled_for = time.monotonic() - self._last_tick
+            if stalled_for < self._interval + self._threshold:
+                continue
+            with self._lock:
+                if self._captured is not None:
+                    continue  # already have the stack for this stall
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._captured = "".join(traceback.format_stack(frame))
+
+    @staticmethod
+    def _format(stats: Dict[str, float]) -> str:
+        return (
+            f"p50={stats['p50']:.1f}ms p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms "
+            f"max={stats['max']:.1f}ms over={int(stats['over_threshold'])}"
+        )
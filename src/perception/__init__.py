@@ -6,9 +6,11 @@ from typing import Optional
 
 @dataclass
 class ImageMessage:
-    content_type: str  # e.g., 'image/jpeg', 'image/png'
+    content_type: str  # e.g., 'image/jpeg', 'image/png', 'image/x-raw-bgr', 'image/x-yuv-i420'
     data: bytes
     width: Optional[int] = None
     height: Optional[int] = None
-    timestamp_ms: Optional[int] = None
-
+    timestamp_ms: Optional[int] = None  # capture time on the client (ms since epoch)
+    seq: Optional[int] = None  # client frame counter, used for gap detection
+    robot_id: Optional[str] = None
+    version: int = 0  # wire protocol version; 0 = legacy length-prefixed JPEG
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Sequence, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from src.perception.model_registry import ModelHandle
+from ultralytics.utils import ops
+
+try:  # moved out of ops in newer ultralytics releases
+    from ultralytics.utils.nms import non_max_suppression
+except ImportError:  # pragma: no cover
+    non_max_suppression = ops.non_max_suppression
+
+
+class _Buffers:
+    """Preallocated input buffers for one source frame size."""
+
+    def __init__(self, src_hw: Tuple[int, int], imgsz: int, stride: int, auto: bool, device, half: bool) -> None:
+        h, w = src_hw
+        r = min(imgsz / h, imgsz / w)
+        self.new_unpad = (int(round(w * r)), int(round(h * r)))  # w, h
+        dw, dh = imgsz - self.new_unpad[0], imgsz - self.new_unpad[1]
+        if auto:
+            # Minimal rectangle, same as ultralytics LetterBox(auto=True) for PyTorch models
+            dw, dh = dw % stride, dh % stride
+        dw, dh = dw / 2, dh / 2
+        self.top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        self.left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        out_h = self.new_unpad[1] + self.top + bottom
+        out_w = self.new_unpad[0] + self.left + right
+
+        self.resize_needed = (w, h) != self.new_unpad
+        self.resized = np.empty((self.new_unpad[1], self.new_unpad[0], 3), dtype=np.uint8)
+        self.canvas = np.full((out_h, out_w, 3), 114, dtype=np.uint8)
+        self.host = np.empty((1, 3, out_h, out_w), dtype=np.float32)
+        self.host_tensor = torch.from_numpy(self.host)  # shares memory with self.host
+        if device.type == "cpu" and not half:
+            self.input = self.host_tensor
+        else:
+            dtype = torch.float16 if half else torch.float32
+            self.input = torch.empty(self.host.shape, dtype=dtype, device=device)
+
+
+class LeanPredictor:
+    """Single-frame inference without the ultralytics predictor pipeline.
+
+    Letterboxes into buffers that are reused across frames, calls the model
+    backend directly and runs NMS on the raw output. Produces the same
+    boxes as `YOLO.predict` with identical conf/iou/classes settings, as an
+    (N, 6) array of x1, y1, x2, y2, conf, cls in source image coordinates.
+
+    Requires that the handle's model has been used through predict() once
+    (ModelRegistry warms every model up), so its AutoBackend exists.
+    """
+
+    def __init__(self, handle: ModelHandle, conf: float, iou: float = 0.7, max_det: int = 300) -> None:
+        predictor = handle.model.predictor
+        if predictor is None or predictor.model is None:
+            raise RuntimeError("model has no predictor yet; call predict() once to warm it up")
+        self.key = handle.key
+        self._lock = handle.lock
+        self._backend = predictor.model
+        self._device = self._backend.device
+        self._half = bool(getattr(self._backend, "fp16", False))
+        self._stride = int(getattr(self._backend, "stride", 32))
+        self._auto = bool(getattr(self._backend, "pt", False))
+        self._imgsz = handle.key.imgsz
+        self._conf = conf
+        self._iou = iou
+        self._max_det = max_det
+        self._buffers: Dict[Tuple[int, int, int], _Buffers] = {}
+
+    def _buffers_for(self, hw: Tuple[int, int], imgsz: int) -> _Buffers:
+        key = (hw[0], hw[1], imgsz)
+        buf = self._buffers.get(key)
+        if buf is None:
+            if len(self._buffers) >= 8:
+                # Bounded: ROI crop sizes vary, drop the oldest shape
+                self._buffers.pop(next(iter(self._buffers)))
+            buf = _Buffers(hw, imgsz, self._stride, self._auto, self._device, self._half)
+            self._buffers[key] = buf
+        return buf
+
+    def __call__(
+            self,
+            image: np.ndarray,
+            class_ids: Sequence[int] | None = None,
+            imgsz: int | None = None,
+            conf: float | None = None
+    ) -> np.ndarray:
+        # Round up to a stride multiple like ultralytics check_imgsz, so
+        # the letterboxed input always matches the model's feature grid
+        imgsz = math.ceil((imgsz or self._imgsz) / self._stride) * self._stride
+        buf = self._buffers_for(image.shape[:2], imgsz)
+
+        # 1. Letterbox into the reused canvas (padding was filled once)
+        if buf.resize_needed:
+            cv2.resize(image, buf.new_unpad, dst=buf.resized, interpolation=cv2.INTER_LINEAR)
+            src = buf.resized
+        else:
+            src = image
+        h, w = src.shape[:2]
+        buf.canvas[buf.top:buf.top + h, buf.left:buf.left + w] = src
+
+        # 2. BGR HWC uint8 -> RGB CHW float [0, 1], written into the preallocated input
+        np.multiply(buf.canvas[..., ::-1].transpose(2, 0, 1), np.float32(1.0 / 255.0), out=buf.host[0])
+
+        with self._lock, torch.inference_mode():
+            if buf.input is not buf.host_tensor:
+                buf.input.copy_(buf.host_tensor, non_blocking=True)
+            preds = self._backend(buf.input)
+
+            # 3. NMS on the raw output, restricted to the wanted classes
+            det = non_max_suppression(
+                preds,
+                self._conf if conf is None else conf,
+                self._iou,
+                classes=list(class_ids) if class_ids else None,
+                max_det=self._max_det,
+            )[0]
+            if det.shape[0]:
+                det[:, :4] = ops.scale_boxes(buf.input.shape[2:], det[:, :4], image.shape)
+            return det[:, :6].float().cpu().numpy()
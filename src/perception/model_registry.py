@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from src.core.logging import logger
+from ultralytics import YOLO
+
+
+@dataclass(frozen=True)
+class ModelKey:
+    """One loaded variant: weights file, device/backend and input resolution."""
+    path: str
+    device: str = "cpu"
+    imgsz: int = 640
+
+
+@dataclass(eq=False)
+class ModelHandle:
+    """A shared, warmed-up model.
+
+    The ultralytics predictor keeps per-call state, so consumers must hold
+    `lock` around predict() when the handle is shared. Handles built for
+    remote inference (InferencePool) only carry the class table; their
+    `model` is None and they are not in the registry.
+    """
+    key: ModelKey
+    model: YOLO | None
+    size_bytes: int
+    names: Dict[int, str]
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    refs: int = 0
+    last_used: float = 0.0
+
+
+class ModelRegistry:
+    """Process-wide cache of YOLO models with an LRU memory budget.
+
+    Each ModelKey is loaded and warmed up once. Handles stay cached after the
+    last consumer releases them, so switching back is a cache hit; when the
+    total size exceeds the budget, the least recently used handles that nobody
+    holds are evicted. A budget of 0 means unlimited.
+    """
+
+    def __init__(self, budget_mb: float = 0.0) -> None:
+        self._budget = int(budget_mb * 1024 * 1024)
+        self._entries: "OrderedDict[ModelKey, ModelHandle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def set_budget(self, budget_mb: float) -> None:
+        with self._lock:
+            self._budget = int(budget_mb * 1024 * 1024)
+            self._evict_locked()
+
+    # -------------------------
+    # Acquire / release
+    # -------------------------
+    def acquire(self, key: ModelKey) -> ModelHandle:
+        """Return the handle for `key`, loading it if needed (blocking)."""
+        with self._lock:
+            handle = self._checkout_locked(key)
+            if handle is not None:
+                self.stats["hits"] += 1
+                return handle
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                handle = self._checkout_locked(key)
+                if handle is not None:
+                    self.stats["hits"] += 1
+                    return handle
+
+            try:
+                handle = self._load(key)
+
+                with self._lock:
+                    self.stats["misses"] += 1
+                    self._entries[key] = handle
+                    handle.refs = 1
+                    handle.last_used = time.monotonic()
+                    self._evict_locked()
+                return handle
+            finally:
+                # Also on a failed load, so a bad key does not leave its lock behind
+                with self._lock:
+                    self._load_locks.pop(key, None)
+
+    async def acquire_async(self, key: ModelKey) -> ModelHandle:
+        """acquire() without blocking the event loop on a cold load."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.acquire, key)
+
+    def release(self, handle: ModelHandle) -> None:
+        with self._lock:
+            handle.refs = max(0, handle.refs - 1)
+            handle.last_used = time.monotonic()
+            self._evict_locked()
+
+    def preload(self, keys: Iterable[ModelKey]) -> None:
+        """Load variants ahead of time so a later switch is a cache hit."""
+        for key in keys:
+            self.release(self.acquire(key))
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [
+                {"key": k, "size_mb": h.size_bytes / 1024 / 1024, "refs": h.refs}
+                for k, h in self._entries.items()
+            ]
+
+    # -------------------------
+    # Internals
+    # -------------------------
+    def _checkout_locked(self, key: ModelKey) -> ModelHandle | None:
+        handle = self._entries.get(key)
+        if handle is None:
+            return None
+        self._entries.move_to_end(key)
+        handle.refs += 1
+        handle.last_used = time.monotonic()
+        return handle
+
+    def _evict_locked(self) -> None:
+        if self._budget <= 0:
+            return
+        total = sum(h.size_bytes for h in self._entries.values())
+        for key in list(self._entries.keys()):  # oldest first
+            if total <= self._budget:
+                break
+            handle = self._entries[key]
+            if handle.refs > 0:
+                continue
+            del self._entries[key]
+            total -= handle.size_bytes
+            self.stats["evictions"] += 1
+            logger.info(f"[ModelRegistry] evicted {key} ({handle.size_bytes / 1024 / 1024:.1f} MB)")
+        if total > self._budget:
+            logger.warning(
+                f"[ModelRegistry] {total / 1024 / 1024:.1f} MB in use exceeds budget "
+                f"{self._budget / 1024 / 1024:.1f} MB; all remaining models are in use"
+            )
+
+    @staticmethod
+    def _load(key: ModelKey) -> ModelHandle:
+        logger.info(f"[ModelRegistry] loading {key.path} (device={key.device}, imgsz={key.imgsz})...")
+        started = time.perf_counter()
+        model = YOLO(key.path)
+        # 預熱模型
+        dummy_img = np.zeros((key.imgsz, key.imgsz, 3), dtype=np.uint8)
+        model.predict(dummy_img, imgsz=key.imgsz, device=key.device, verbose=False)
+        handle = ModelHandle(
+            key=key,
+            model=model,
+            size_bytes=ModelRegistry._model_size(model, key.path),
+            names={int(k): v for k, v in model.names.items()},
+        )
+        logger.info(
+            f"[ModelRegistry] {key.path} ready in {time.perf_counter() - started:.1f}s "
+            f"({handle.size_bytes / 1024 / 1024:.1f} MB)"
+        )
+        return handle
+
+    @staticmethod
+    def _model_size(model: YOLO, path: str) -> int:
+        try:
+            module = model.model
+            tensors = list(module.parameters()) + list(module.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            # Exported backends (ONNX, TensorRT, ...) have no torch parameters
+            try:
+                return os.path.getsize(path)
+            except OSError:
+                return 0
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """The process-wide registry shared by all YoloInference instances."""
+    return _registry
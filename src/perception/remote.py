@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.communication.image_receiver.protocols import encode_message, read_message
+from src.core.logging import logger
+from src.core.metrics import percentiles
+from src.perception import ImageMessage
+
+
+class WorkerLost(ConnectionError):
+    """The worker connection dropped before a reply arrived."""
+
+
+class RemoteInferenceError(RuntimeError):
+    """A worker answered with an error (e.g. the frame could not be decoded)."""
+
+
+@dataclass(frozen=True)
+class WorkerEndpoint:
+    host: str
+    port: int
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def parse_workers(spec: str) -> List[WorkerEndpoint]:
+    """Parse `host:port,host:port`."""
+    workers: List[WorkerEndpoint] = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"invalid worker address {entry!r}, expected host:port")
+        workers.append(WorkerEndpoint(host, int(port)))
+    return workers
+
+
+class WorkerLink:
+    """Persistent connection to one inference worker.
+
+    Requests are pipelined: submit() writes immediately and returns a future
+    that the reader task resolves when the matching reply arrives. When the
+    connection drops, every outstanding future fails with WorkerLost and the
+    task reconnects with backoff.
+    """
+
+    MAX_BUFFERED_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, endpoint: WorkerEndpoint, connect_timeout: float = 3.0, max_retry_delay: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self._connect_timeout = connect_timeout
+        self._max_retry_delay = max_retry_delay
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+        self._pending: Dict[int, Tuple[float, asyncio.Future]] = {}
+        self.ready = asyncio.Event()
+        self.hello: Dict[str, Any] = {}
+
+        self._latencies: Deque[float] = deque(maxlen=512)
+        self.latency_ema: float = 0.0
+        self.sent = 0
+        self.completed = 0
+        self.failures = 0
+        self.reconnects = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and self.ready.is_set()
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._pending)
+
+    @property
+    def backlogged(self) -> bool:
+        """The worker is not reading fast enough; don't queue more frames on it."""
+        writer = self._writer
+        return writer is not None and writer.transport.get_write_buffer_size() > self.MAX_BUFFERED_BYTES
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"inference-worker-{self.endpoint}")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._close()
+
+    def submit(self, request_id: int, header: Dict[str, Any], payload: bytes) -> asyncio.Future:
+        if not self.connected:
+            raise WorkerLost(f"worker {self.endpoint} is not connected")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (time.monotonic(), future)
+        self._writer.write(encode_message({**header, "id": request_id}, payload))
+        self.sent += 1
+        return future
+
+    def forget(self, request_id: int) -> None:
+        """Stop waiting for a reply (timed out); a late reply is ignored."""
+        self._pending.pop(request_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        out = percentiles([lat * 1000.0 for lat in self._latencies])
+        out.update(
+            connected=int(self.connected), outstanding=self.outstanding, sent=self.sent,
+            completed=self.completed, failures=self.failures, reconnects=self.reconnects,
+        )
+        return out
+
+    # =======================
+    # Connection task
+    # =======================
+    async def _run(self) -> None:
+        delay = 0.5
+        while True:
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.endpoint.host, self.endpoint.port), timeout=self._connect_timeout
+                )
+                hello, _ = await asyncio.wait_for(read_message(reader), timeout=self._connect_timeout)
+                if hello.get("type") != "hello":
+                    raise ConnectionError(f"expected hello, got {hello.get('type')!r}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ [InferencePool] connect to {self.endpoint} failed: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(self._max_retry_delay, delay * 2)
+                continue
+
+            self._writer, self.hello = writer, hello
+            if self.sent or self.failures:
+                self.reconnects += 1
+            self.ready.set()
+            delay = 0.5
+            logger.info(f"✅ [InferencePool] connected to worker {self.endpoint} ({hello.get('model')})")
+            try:
+                await self._read_replies(reader)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ [InferencePool] worker {self.endpoint} lost: {e!r}")
+            finally:
+                await self._close()
+
+    async def _read_replies(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            reply, _ = await read_message(reader)
+            entry = self._pending.pop(reply.get("id"), None)
+            if entry is None:
+                continue  # timed out on our side
+            submitted_at, future = entry
+            if not future.done():
+                future.set_result(reply)
+            latency = time.monotonic() - submitted_at
+            self._latencies.append(latency)
+            self.latency_ema = latency if not self.completed else 0.2 * latency + 0.8 * self.latency_ema
+            self.completed += 1
+
+    async def _close(self) -> None:
+        self.ready.clear()
+        writer, self._writer = self._writer, None
+        pending, self._pending = self._pending, {}
+        if pending:
+            self.failures += 1
+        for _, future in pending.values():
+            if not future.done():
+                future.set_exception(WorkerLost(f"worker {self.endpoint} disconnected"))
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+
+class InferencePool(AbstractAsyncContextManager):
+    """Sends frames to standalone inference workers (see worker.py).
+
+    Callers keep about `capacity` frames in flight; each goes to the
+    connected worker with the fewest outstanding requests (ties: lowest
+    recent latency). If that worker disconnects before
+    replying, the frame is re-dispatched to another one; a frame that is not
+    answered within `timeout` is dropped, since a late box is no use for
+    steering. Frames are forwarded as received, so decoding also happens on
+    the workers.
+    """
+
+    def __init__(
+            self,
+            endpoints: Sequence[WorkerEndpoint],
+            timeout: float = 2.0,
+            startup_timeout: float = 10.0
+    ) -> None:
+        if not endpoints:
+            raise ValueError("no inference workers configured")
+        self._links = [WorkerLink(ep) for ep in endpoints]
+        self._timeout = timeout
+        self._startup_timeout = startup_timeout
+        self._ids = itertools.count(1)
+        self.names: Dict[int, str] = {}
+        self.model: str = ""
+        self.counters = {"requests": 0, "redispatched": 0, "timeouts": 0, "errors": 0, "no_worker": 0}
+
+    async def __aenter__(self) -> "InferencePool":
+        for link in self._links:
+            link.start()
+        waiters = [asyncio.create_task(link.ready.wait()) for link in self._links]
+        done, pending = await asyncio.wait(waiters, timeout=self._startup_timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if not done:
+            await self._stop_links()
+            raise RuntimeError(f"no inference worker reachable within {self._startup_timeout:.0f}s")
+        # The class table comes from the first worker that answered
+        hello = next(link.hello for link in self._links if link.connected)
+        self.names = {int(k): v for k, v in hello.get("names", {}).items()}
+        self.model = str(hello.get("model", ""))
+        logger.info(f"[InferencePool] {len(self._links)} worker(s), model {self.model}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self._stop_links()
+        logger.info(f"[InferencePool] stopped: {self.counters}")
+
+    async def _stop_links(self) -> None:
+        await asyncio.gather(*(link.stop() for link in self._links), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pool": dict(self.counters), "workers": {str(link.endpoint): link.stats() for link in self._links}}
+
+    @property
+    def capacity(self) -> int:
+        """How many frames to keep in flight: one per worker that can take one."""
+        return max(1, sum(1 for link in self._links if link.connected and not link.backlogged))
+
+    def _pick(self, exclude: set) -> Optional[WorkerLink]:
+        candidates = [link for link in self._links if link.connected and not link.backlogged and link not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda link: (link.outstanding, link.latency_ema))
+
+    async def infer(
+            self,
+            message: ImageMessage,
+            class_ids: Sequence[int],
+            conf: float,
+            imgsz: int | None = None
+    ) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Boxes for one frame as an (N, 6) array plus the frame's (height, width)."""
+        header = {
+            "type": "infer",
+            "content_type": message.content_type,
+            "width": message.width,
+            "height": message.height,
+            "classes": list(class_ids),
+            "conf": conf,
+            "imgsz": imgsz,
+        }
+        self.counters["requests"] += 1
+        tried: set = set()
+        while True:
+            link = self._pick(tried)
+            if link is None:
+                self.counters["no_worker"] += 1
+                raise WorkerLost("no inference worker available")
+            request_id = next(self._ids)
+            try:
+                future = link.submit(request_id, header, message.data)
+                reply = await asyncio.wait_for(future, self._timeout)
+            except WorkerLost:
+                tried.add(link)
+                self.counters["redispatched"] += 1
+                continue
+            except asyncio.TimeoutError:
+                link.forget(request_id)
+                self.counters["timeouts"] += 1
+                raise
+            if reply.get("type") != "result":
+                self.counters["errors"] += 1
+                raise RemoteInferenceError(f"worker {link.endpoint}: {reply.get('error', reply.get('type'))}")
+            boxes = np.asarray(reply.get("boxes", []), dtype=np.float32).reshape(-1, 6)
+            return boxes, (int(reply["height"]), int(reply["width"]))
@@ -0,0 +1,165 @@
+"""Standalone inference worker for InferencePool (remote.py).
+
+    python -m src.perception.worker --port 9100 --model yolov8s.pt --device cuda:0
+
+After connecting, a client receives a "hello" with the model's class table.
+Each "infer" request (JSON header plus the frame bytes as the camera sent
+them) is answered with a "result" holding the boxes in source image
+coordinates, or an "error". Frames run through the model one at a time;
+requests on a connection are answered in order.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Dict, Set
+
+from src.communication.image_receiver.protocols import encode_message, read_message
+from src.core.logging import logger, setup_logging
+from src.perception import ImageMessage
+from src.perception.lean_inference import LeanPredictor
+from src.perception.model_registry import ModelHandle, ModelKey, ModelRegistry, get_registry
+from src.perception.yolo_inference import decode_image, predict_boxes
+
+
+class InferenceWorker(AbstractAsyncContextManager):
+    def __init__(
+            self,
+            model_path: str,
+            host: str = "0.0.0.0",
+            port: int = 9100,
+            device: str = "cpu",
+            imgsz: int = 640,
+            lean: bool = False,
+            registry: ModelRegistry | None = None
+    ) -> None:
+        self._key = ModelKey(model_path, device, imgsz)
+        self._host = host
+        self.port = port
+        self._lean = lean
+        self._registry = registry or get_registry()
+        self._handle: ModelHandle | None = None
+        self._lean_runner: LeanPredictor | None = None
+        # One inference thread: frames queue here instead of competing for the model
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference-worker")
+        self._server: asyncio.AbstractServer | None = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self.stats = {"requests": 0, "errors": 0, "busy_s": 0.0}
+
+    async def __aenter__(self) -> "InferenceWorker":
+        self._handle = await self._registry.acquire_async(self._key)
+        if self._lean:
+            self._lean_runner = LeanPredictor(self._handle, conf=0.25)
+        self._server = await asyncio.start_server(self._handle_client, self._host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"[InferenceWorker] serving {self._key.path} on {self._host}:{self.port}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            self._registry.release(handle)
+        logger.info(f"[InferenceWorker] stopped: {self.stats}")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        self._writers.add(writer)
+        logger.info(f"[InferenceWorker] client connected: {peer}")
+        try:
+            handle = self._handle
+            writer.write(encode_message({
+                "type": "hello",
+                "model": handle.key.path,
+                "imgsz": handle.key.imgsz,
+                "names": {str(k): v for k, v in handle.names.items()},
+            }))
+            await writer.drain()
+            loop = asyncio.get_running_loop()
+            while True:
+                request, payload = await read_message(reader)
+                if request.get("type") != "infer":
+                    continue
+                reply = await loop.run_in_executor(self._executor, self._run, request, payload)
+                writer.write(encode_message(reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"[InferenceWorker] connection {peer} failed: {e!r}")
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            logger.info(f"[InferenceWorker] client disconnected: {peer}")
+
+    def _run(self, request: Dict[str, Any], payload: bytes) -> Dict[str, Any]:
+        """Decode and infer one frame (inference thread)."""
+        started = time.perf_counter()
+        self.stats["requests"] += 1
+        try:
+            message = ImageMessage(
+                content_type=request.get("content_type") or "image/jpeg",
+                data=payload,
+                width=request.get("width"),
+                height=request.get("height"),
+            )
+            image = decode_image(message)
+            if image is None:
+                raise ValueError("cannot decode frame")
+            classes = request.get("classes") or None
+            conf = float(request.get("conf", 0.25))
+            imgsz = request.get("imgsz")
+            if self._lean_runner is not None:
+                boxes = self._lean_runner(image, classes, imgsz, conf)
+            else:
+                boxes = predict_boxes(self._handle, image, classes, conf, imgsz)
+            return {
+                "type": "result",
+                "id": request.get("id"),
+                "boxes": boxes[:, :6].round(2).tolist(),
+                "height": int(image.shape[0]),
+                "width": int(image.shape[1]),
+                "infer_ms": round((time.perf_counter() - started) * 1000.0, 2),
+            }
+        except Exception as e:
+            self.stats["errors"] += 1
+            return {"type": "error", "id": request.get("id"), "error": str(e)}
+        finally:
+            self.stats["busy_s"] += time.perf_counter() - started
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    async with InferenceWorker(
+            args.model, host=args.host, port=args.port, device=args.device, imgsz=args.imgsz, lean=args.lean
+    ):
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inference worker for INFERENCE_WORKERS")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--model", default="yolov8s.pt")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--lean", action="store_true", help="use the lean inference path (see YOLO_LEAN)")
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import time
 import cv2
 import numpy as np
 from contextlib import AbstractAsyncContextManager
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Callable, FrozenSet, Iterable, List, Set, Tuple
 
-from src.core.events import EventBus, Event
+from src.core.events import EventBus, Event, Priority
 from src.core.logging import logger
-from ultralytics import YOLO
+from src.perception import ImageMessage
+from src.perception.lean_inference import LeanPredictor
+from src.perception.model_registry import ModelHandle, ModelKey, ModelRegistry, get_registry
+from src.perception.remote import InferencePool
 
 
 @dataclass
@@ -19,6 +23,56 @@ class Detection:
     conf: float
 
 
+def decode_image(message: ImageMessage) -> np.ndarray | None:
+    """Turn an ImageMessage into a BGR image; raw frames skip cv2.imdecode."""
+    ctype = message.content_type
+    if ctype == "image/x-raw-bgr":
+        if not message.width or not message.height:
+            return None
+        return np.frombuffer(message.data, dtype=np.uint8).reshape(message.height, message.width, 3)
+    if ctype == "image/x-yuv-i420":
+        if not message.width or not message.height:
+            return None
+        yuv = np.frombuffer(message.data, dtype=np.uint8).reshape(message.height * 3 // 2, message.width)
+        return cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_I420)
+    image_np = np.frombuffer(message.data, dtype=np.uint8)
+    return cv2.imdecode(image_np, cv2.IMREAD_COLOR)
+
+
+def predict_boxes(
+        handle: ModelHandle,
+        image: np.ndarray,
+        class_ids: Iterable[int] | None,
+        conf: float,
+        imgsz: int | None = None
+) -> np.ndarray:
+    """YOLO.predict() on one frame; returns an (N, 6) array of x1, y1, x2, y2, conf, cls."""
+    with handle.lock:
+        results = handle.model.predict(
+            source=image,
+            imgsz=imgsz or handle.key.imgsz,
+            conf=conf,
+            classes=list(class_ids) if class_ids else None,
+            device=handle.key.device,
+            verbose=False
+        )
+    if not results:
+        return np.empty((0, 6), dtype=np.float32)
+    return results[0].boxes.data.cpu().numpy()
+
+
+@dataclass(frozen=True)
+class TargetSelection:
+    """Immutable snapshot of the classes to track.
+
+    Replaced as a whole by set_targets() (GUI thread) and read once per frame by
+    _detect(), so a frame never sees half of an update.
+    """
+    names: FrozenSet[str] = frozenset()
+    ids: Tuple[int, ...] | None = None  # None until the model's class table is known
+    model: ModelKey | None = None  # the model `ids` were resolved against
+
+
 class YoloInference(AbstractAsyncContextManager):
     def __init__(
             self,
@@ -27,14 +81,51 @@ class YoloInference(AbstractAsyncContextManager):
             device: str = "gpu",
             target_classes: List[str] | None = None,
             conf_threshold: float = 0.5,
-            image_size: tuple[int, int] = (480, 640)  # Height, Width
+            image_size: tuple[int, int] = (480, 640),  # Height, Width
+            max_frame_age_ms: float = 0.0,
+            frame_age_reference: str = "receive",
+            imgsz: int = 640,
+            registry: ModelRegistry | None = None,
+            lean: bool = False,
+            roi: bool = False,
+            roi_padding: float = 1.0,
+            roi_imgsz: int = 0,
+            roi_refresh_every: int = 30,
+            remote: InferencePool | None = None
     ) -> None:
         self._model_path = model_path
         self._device = device
+        self._imgsz = imgsz
         self._bus = bus
-        self._yolo: YOLO | None = None
-        self._target_classes = target_classes
-        self._target = ""
+        self._registry = registry or get_registry()
+        self._handle: ModelHandle | None = None
+        # Remote mode: frames go to the worker pool, no model is loaded here
+        self._remote = remote
+        if remote is not None and (lean or roi):
+            logger.info("YoloInference: lean/ROI settings are ignored with remote workers")
+        # Requests in flight (about one per connected worker) and the newest frame waiting for a slot
+        self._remote_tasks: Set[asyncio.Task] = set()
+        self._remote_waiting: Tuple[Event, ImageMessage] | None = None
+        # Receive time of the frame behind the current command; older results are discarded
+        self._last_applied = float("-inf")
+        # detections_found (which carries the decoded frame) is only published while this
+        # returns True, e.g. PreviewServer.has_viewers; nobody is watching by default
+        self.publish_detections: Callable[[], bool] = lambda: False
+        # Lean mode bypasses the ultralytics predictor (see lean_inference.py)
+        self._lean = lean
+        self._lean_runner: LeanPredictor | None = None
+        # ROI mode: once a target is found, infer on a padded crop around it
+        self._roi = roi
+        self._roi_padding = roi_padding
+        self._roi_imgsz = roi_imgsz or None  # None = model imgsz
+        self._roi_refresh_every = roi_refresh_every
+        self._roi_min_size = 96
+        self._roi_edge_margin = 4
+        self._last_box: Tuple[int, int, int, int] | None = None
+        self._roi_streak = 0
+        self.roi_stats = {"roi": 0, "full": 0, "fallback": 0}
+        self._target_classes = list(target_classes) if target_classes else None
+        self._selection = TargetSelection()
         self._conf_threshold = conf_threshold
         self._image_area = image_size[0] * image_size[1]
 
@@ -45,27 +136,75 @@ class YoloInference(AbstractAsyncContextManager):
         self.center_deadzone = 200.0
         # Calculate center based on image width (index 1)
         self.image_center_x = image_size[1] / 2.0
+        self._image_width = float(image_size[1])
         self.image_height = float(image_size[0])
 
         self.detected = False
         self.command = {"left": 0.0, "right": 0.0}
+        # Smoothed (EMA) inference time in seconds; None until the first frame
+        self.inference_latency: float | None = None
+        self._latency_alpha = 0.2
+        # Client capture time -> command decided (needs a v1 client; clocks must be in sync)
+        self.capture_to_command_ms: float | None = None
+
+        # Staleness budget: frames older than this are not worth steering on (0 disables)
+        if frame_age_reference not in ("receive", "capture"):
+            raise ValueError(f"frame_age_reference must be 'receive' or 'capture', got {frame_age_reference!r}")
+        self._max_frame_age_ms = max_frame_age_ms
+        self._frame_age_reference = frame_age_reference
+        self.drop_stats = {"stale_before_decode": 0, "stale_before_inference": 0, "replaced": 0, "out_of_order": 0}
         logger.info(f"YoloInference initialized with model: {model_path}")
 
+    @property
+    def targets(self) -> FrozenSet[str]:
+        return self._selection.names
+
     def set_target(self, target: str) -> None:
-        self._target = target
-        logger.info(f"YoloInference target set to: {target}")
+        """Track a single class; an empty string clears the target."""
+        self.set_targets([target] if target else [])
+
+    def set_targets(self, targets: Iterable[str]) -> None:
+        """Track any of the given classes. Safe to call from other threads."""
+        names = frozenset(t for t in targets if t)
+        if self._target_classes is not None:
+            unknown = names.difference(self._target_classes)
+            if unknown:
+                logger.warning(f"Ignoring targets not in target_classes: {sorted(unknown)}")
+                names = names.difference(unknown)
+        self._selection = self._resolve(names, self._handle)
+        logger.info(f"YoloInference targets set to: {sorted(names) or 'none'}")
+
+    @staticmethod
+    def _resolve(names: FrozenSet[str], handle: ModelHandle | None) -> TargetSelection:
+        if handle is None:
+            return TargetSelection(names)
+        name_to_id = {name: idx for idx, name in handle.names.items()}
+        missing = [n for n in names if n not in name_to_id]
+        if missing:
+            logger.warning(f"Model {handle.key.path} has no class named {missing}")
+        ids = tuple(sorted(name_to_id[n] for n in names if n in name_to_id))
+        return TargetSelection(names, ids, handle.key)
+
+    @property
+    def model_key(self) -> ModelKey:
+        return ModelKey(self._model_path, self._device, self._imgsz)
 
     async def __aenter__(self) -> "YoloInference":
+        if self._remote is not None:
+            # The workers own the model; only its class table is needed here
+            key = ModelKey(f"remote:{self._remote.model}", self._device, self._imgsz)
+            self._activate(ModelHandle(key, model=None, size_bytes=0, names=dict(self._remote.names)))
+            self._bus.subscribe("image_received", self._detect)
+            logger.info(f"YoloInference started with remote workers ({self._remote.model})")
+            return self
+
         logger.info(f"Loading YOLO model from {self._model_path}...")
         try:
-            self._yolo = YOLO(self._model_path)
-            # 預熱模型
-            dummy_img = np.zeros((640, 640, 3), dtype=np.uint8)
-            self._yolo.predict(dummy_img, device=self._device, verbose=False)
-            logger.info("YOLO model loaded and warmed up.")
+            handle = await self._registry.acquire_async(self.model_key)
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}")
             raise
+        self._activate(handle)
 
         self._bus.subscribe("image_received", self._detect)
         logger.info("YoloInference started and subscribed to 'image_received'")
@@ -73,7 +212,72 @@ class YoloInference(AbstractAsyncContextManager):
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
         logger.info("YoloInference stopped")
-        self._yolo = None
+        self._remote_waiting = None
+        tasks = list(self._remote_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        handle, self._handle = self._handle, None
+        if handle is not None and self._remote is None:
+            self._registry.release(handle)
+
+    async def switch_model(self, model_path: str, device: str | None = None, imgsz: int | None = None) -> None:
+        """Swap to another model variant; a cache hit if it was loaded before."""
+        if self._remote is not None:
+            raise RuntimeError("the model is chosen by the inference workers in remote mode")
+        key = ModelKey(model_path, device or self._device, imgsz or self._imgsz)
+        handle = await self._registry.acquire_async(key)
+        old = self._handle
+        self._model_path, self._device, self._imgsz = key.path, key.device, key.imgsz
+        self._activate(handle)
+        if old is not None:
+            self._registry.release(old)
+        logger.info(f"YoloInference switched to {key.path} (device={key.device}, imgsz={key.imgsz})")
+
+    def _activate(self, handle: ModelHandle) -> None:
+        self._handle = handle
+        self._selection = self._resolve(self._selection.names, handle)
+
+    def _record_latency(self, seconds: float) -> None:
+        if self.inference_latency is None:
+            self.inference_latency = seconds
+        else:
+            a = self._latency_alpha
+            self.inference_latency = a * seconds + (1 - a) * self.inference_latency
+
+    def _record_capture_latency(self, message: ImageMessage) -> None:
+        if message.timestamp_ms:
+            self.capture_to_command_ms = time.time() * 1000.0 - message.timestamp_ms
+
+    def frame_age_ms(self, event: Event, message: ImageMessage) -> float | None:
+        """Age of a frame in ms, measured from client capture or server receive time."""
+        if self._frame_age_reference == "capture" and message.timestamp_ms:
+            return time.time() * 1000.0 - message.timestamp_ms
+        received_at = event.payload.get("received_at")
+        if received_at is None:
+            return None
+        return (time.monotonic() - received_at) * 1000.0
+
+    def _is_stale(self, event: Event, message: ImageMessage, counter: str) -> bool:
+        if self._max_frame_age_ms <= 0:
+            return False
+        age = self.frame_age_ms(event, message)
+        if age is None or age <= self._max_frame_age_ms:
+            return False
+        self.drop_stats[counter] += 1
+        logger.debug(f"Dropped frame ({counter}): {age:.0f}ms old > {self._max_frame_age_ms:.0f}ms budget")
+        return True
+
+    @staticmethod
+    def _message_from(event: Event) -> ImageMessage | None:
+        message = event.payload.get("message")
+        if message is not None:
+            return message
+        # Publishers that only provide raw JPEG bytes
+        image_bytes: bytes | None = event.payload.get("bytes")
+        if not image_bytes:
+            return None
+        return ImageMessage(content_type="image/jpeg", data=image_bytes)
 
     def _calculate_velocity(self, offset: float, area: float) -> Tuple[float, float]:
         """
@@ -93,108 +297,226 @@ class YoloInference(AbstractAsyncContextManager):
             else:
                 return 0.0, 0.0  # Stop (Too close)
 
+    def _frame_selection(self) -> Tuple[ModelHandle, TargetSelection] | None:
+        """One consistent view of the model and targets for a frame; None when idle."""
+        handle = self._handle
+        if handle is None:
+            return None
+        selection = self._selection
+        if selection.model != handle.key:
+            selection = self._resolve(selection.names, handle)
+        if not selection.ids:
+            # Nothing to look for: skip decode and inference entirely
+            self._set_idle()
+            return None
+        return handle, selection
+
     async def _detect(self, event: Event) -> None:
-        if self._yolo is None:
+        frame = self._frame_selection()
+        if frame is None:
             return
 
         # 1. Decode Image
+        message = self._message_from(event)
+        if message is None:
+            return
+        if self._is_stale(event, message, "stale_before_decode"):
+            return
+        if self._remote is not None:
+            # The frame goes to a worker as received; the bus is not held up meanwhile
+            self._submit_remote(event, message)
+            return
+        handle, selection = frame
         try:
-            image_bytes: bytes | None = event.payload.get("bytes")
-            if not image_bytes:
-                return
-            image_np = np.frombuffer(image_bytes, dtype=np.uint8)
-            image = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
+            image = decode_image(message)
             if image is None:
                 return
         except Exception as e:
             logger.error(f"Error decoding image: {e}")
             return
 
-        # 2. Run Inference
+        # 2. Run Inference (only the selected classes go through NMS)
+        if self._is_stale(event, message, "stale_before_inference"):
+            return
         loop = asyncio.get_running_loop()
+        started = time.perf_counter()
         try:
-            results = await loop.run_in_executor(
-                None,
-                lambda: self._yolo.predict(
-                    source=image,
-                    imgsz=640,
-                    conf=self._conf_threshold,
-                    device=self._device,
-                    verbose=False
-                )
-            )
+            boxes = await loop.run_in_executor(None, self._infer, handle, image, selection.ids)
         except Exception as e:
             logger.error(f"YOLO prediction failed: {e}")
             return
+        self._record_latency(time.perf_counter() - started)
+        await self._apply(event, message, image, boxes, image.shape[:2], selection, handle)
 
-        # 3. Process Results
-        target_detections: List[Detection] = []
+    def _submit_remote(self, event: Event, message: ImageMessage) -> None:
+        """Start remote inference, or park the frame if every worker is busy."""
+        if len(self._remote_tasks) >= self._remote.capacity:
+            if self._remote_waiting is not None:
+                self.drop_stats["replaced"] += 1
+            self._remote_waiting = (event, message)
+            return
+        task = asyncio.create_task(self._detect_remote(event, message))
+        self._remote_tasks.add(task)
+        task.add_done_callback(self._remote_done)
 
-        if results:
-            result = results[0]
-            names = result.names
-            # Parse boxes to find our specific target
-            for box in result.boxes:
+    def _remote_done(self, task: asyncio.Task) -> None:
+        self._remote_tasks.discard(task)
+        waiting, self._remote_waiting = self._remote_waiting, None
+        if waiting is not None and not task.cancelled():
+            event, message = waiting
+            if not self._is_stale(event, message, "stale_before_inference"):
+                self._submit_remote(event, message)
 
-                cls_id = int(box.cls)
-                cls_name = result.names[cls_id]
-                # logger.info(f"Found {cls_name}")
+    async def _detect_remote(self, event: Event, message: ImageMessage) -> None:
+        frame = self._frame_selection()
+        if frame is None:
+            return
+        handle, selection = frame
+        started = time.perf_counter()
+        try:
+            boxes, frame_hw = await self._remote.infer(message, selection.ids, self._conf_threshold)
+        except Exception as e:
+            logger.error(f"Remote inference failed: {e!r}")
+            return
+        self._record_latency(time.perf_counter() - started)
+        # Decoding happens on the worker, so there is no image to share here
+        await self._apply(event, message, None, boxes, frame_hw, selection, handle)
 
-                # Filter only for the currently set target
-                if cls_name == self._target:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = float(box.conf[0])
-                    target_detections.append(Detection((x1, y1, x2, y2), cls_name, conf))
+    async def _apply(
+            self,
+            event: Event,
+            message: ImageMessage,
+            image: np.ndarray | None,
+            boxes: np.ndarray,
+            frame_hw: Tuple[int, int],
+            selection: TargetSelection,
+            handle: ModelHandle
+    ) -> None:
+        """Turn one frame's boxes into the current command, unless a newer frame already did."""
+        # Remote results can arrive out of order
+        order = event.payload.get("received_at") or time.monotonic()
+        if order < self._last_applied:
+            self.drop_stats["out_of_order"] += 1
+            return
+        self._last_applied = order
 
+        # 3. Process Results (state is updated before publishing, so a newer
+        # result that lands during the publish is not overwritten)
+        target_detections = self._to_detections(boxes, selection, handle)
+        if target_detections:
+            self._steer(target_detections, frame_hw)
+            self._record_capture_latency(message)
+        else:
+            self._last_box = None
+            self._set_idle()
 
-            if target_detections:
-                self.detected = True
+        # 發布結果 for viewers (preview server); the image is shared, not copied. Sent on the
+        # diagnostics lane so it is never counted as perception backlog
+        if self.publish_detections():
+            await self._bus.publish(Event(
+                type="detections_found",
+                payload={"detections": target_detections, "image": image, "message": message}
+            ), Priority.DIAGNOSTICS)
 
-                # Logic Step A: Find the largest target (closest)
-                area = (x2 - x1) * (y2 - y1)
-                target = max(target_detections, key=lambda d: (d.bbox[2] - d.bbox[0]) * (d.bbox[3] - d.bbox[1]))
+    def _steer(self, target_detections: List[Detection], frame_hw: Tuple[int, int]) -> None:
+        self.detected = True
 
-                # Logic Step B: Calculate Features
-                x1, y1, x2, y2 = target.bbox
-                center_x = (x1 + x2) / 2
-                height = y2 - y1
+        # Logic Step A: Find the largest target (closest)
+        target = max(target_detections, key=lambda d: (d.bbox[2] - d.bbox[0]) * (d.bbox[3] - d.bbox[1]))
+        self._last_box = target.bbox
 
-                offset = center_x - self.image_center_x
-                # dist_score = height / self.image_height
+        # Logic Step B: Calculate Features
+        # (frames may be smaller than configured when the client follows quality hints,
+        # so measure in frame pixels and rescale to the configured resolution)
+        x1, y1, x2, y2 = target.bbox
+        frame_h, frame_w = frame_hw
+        sx = self._image_width / frame_w
+        sy = self.image_height / frame_h
+        area = (x2 - x1) * (y2 - y1) * sx * sy
+        center_x = (x1 + x2) / 2
 
-                # Logic Step C: Calculate Command
-                left_vel, right_vel = self._calculate_velocity(offset, area)
+        offset = (center_x - frame_w / 2.0) * sx
 
-                # Save command
-                self.command = {"left": left_vel, "right": right_vel}
+        # Logic Step C: Calculate Command
+        left_vel, right_vel = self._calculate_velocity(offset, area)
 
-            else:
-                self.detected = False
-                self.command = {"left": 0.0, "right": 0.0}
-        else:
-            # No results at all
-            self.detected = False
-            self.command = {"left": 0.0, "right": 0.0}
-        #     for box in result.boxes:
-        #         # 取得座標與資訊
-        #         x1, y1, x2, y2 = map(int, box.xyxy[0])
-        #         conf = float(box.conf)
-        #         cls_id = int(box.cls)
-        #         label = names[cls_id]
-        #
-        #         # 過濾類別
-        #         if self._target_classes and label not in self._target_classes:
-        #             continue
-        #
-        #         detections.append(Detection(
-        #             bbox=(x1, y1, x2, y2),
-        #             cls=label,
-        #             conf=conf
-        #         ))
-        #
-        # # 4. 發布結果 (只印 Log，不開視窗)
-        # if detections:
-        #     det_info = ", ".join([f"{d.cls} ({d.conf:.2f})" for d in detections])
-        #     logger.info(f"Found {len(detections)} targets: {det_info}")
-        #
-        # await self._bus.publish(Event(type="detections_found", payload={"detections": detections}))
\ No newline at end of file
+        # Save command
+        self.command = {"left": left_vel, "right": right_vel}
+
+    def _infer(self, handle: ModelHandle, image: np.ndarray, class_ids: Tuple[int, ...]) -> np.ndarray:
+        """Inference on the ROI around the last target if possible, else the full frame."""
+        crop = self._roi_crop(image.shape[:2]) if self._roi else None
+        if crop is not None:
+            cx1, cy1, cx2, cy2 = crop
+            boxes = self._predict(handle, image[cy1:cy2, cx1:cx2], class_ids, self._roi_imgsz)
+            boxes[:, [0, 2]] += cx1
+            boxes[:, [1, 3]] += cy1
+            if len(boxes) and not self._touches_inner_edge(boxes, crop, image.shape[:2]):
+                self._roi_streak += 1
+                self.roi_stats["roi"] += 1
+                return boxes
+            # Target lost in the crop or cut off by it: look at the whole frame
+            self.roi_stats["fallback"] += 1
+        self._roi_streak = 0
+        self.roi_stats["full"] += 1
+        return self._predict(handle, image, class_ids)
+
+    def _roi_crop(self, hw: Tuple[int, int]) -> Tuple[int, int, int, int] | None:
+        box = self._last_box
+        if box is None or self._roi_streak >= self._roi_refresh_every:
+            return None
+        h, w = hw
+        x1, y1, x2, y2 = box
+        # Square-ish crop padded around the box, rounded up to a multiple of 32 so
+        # letterbox buffers get reused
+        side = max(x2 - x1, y2 - y1) * (1.0 + 2.0 * self._roi_padding)
+        cw = min(w, max(self._roi_min_size, int(np.ceil(side / 32.0)) * 32))
+        ch = min(h, max(self._roi_min_size, int(np.ceil(side / 32.0)) * 32))
+        if cw * ch >= 0.6 * w * h:
+            return None  # hardly smaller than the frame
+        cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+        left = min(max(0, cx - cw // 2), w - cw)
+        top = min(max(0, cy - ch // 2), h - ch)
+        return left, top, left + cw, top + ch
+
+    def _touches_inner_edge(self, boxes: np.ndarray, crop: Tuple[int, int, int, int], hw: Tuple[int, int]) -> bool:
+        """True if a box reaches a crop edge that is not also a frame edge."""
+        cx1, cy1, cx2, cy2 = crop
+        h, w = hw
+        m = self._roi_edge_margin
+        for x1, y1, x2, y2 in boxes[:, :4]:
+            if (cx1 > 0 and x1 <= cx1 + m) or (cy1 > 0 and y1 <= cy1 + m):
+                return True
+            if (cx2 < w and x2 >= cx2 - m) or (cy2 < h and y2 >= cy2 - m):
+                return True
+        return False
+
+    def _predict(
+            self,
+            handle: ModelHandle,
+            image: np.ndarray,
+            class_ids: Tuple[int, ...],
+            imgsz: int | None = None
+    ) -> np.ndarray:
+        """Run the model; returns an (N, 6) array of x1, y1, x2, y2, conf, cls."""
+        if self._lean:
+            runner = self._lean_runner
+            if runner is None or runner.key != handle.key:
+                runner = self._lean_runner = LeanPredictor(handle, self._conf_threshold)
+            return runner(image, class_ids, imgsz)
+        return predict_boxes(handle, image, class_ids, self._conf_threshold, imgsz)
+
+    @staticmethod
+    def _to_detections(boxes: np.ndarray, selection: TargetSelection, handle: ModelHandle) -> List[Detection]:
+        names = handle.names
+        detections: List[Detection] = []
+        for x1, y1, x2, y2, conf, cls_id in boxes[:, :6]:
+            cls_id = int(cls_id)
+            if cls_id not in selection.ids:
+                continue
+            detections.append(Detection((int(x1), int(y1), int(x2), int(y2)), names.get(cls_id, str(cls_id)), float(conf)))
+        return detections
+
+    def _set_idle(self) -> None:
+        self.detected = False
+        self.command = {"left": 0.0, "right": 0.0}
@@ -0,0 +1 @@
+# Simulation package: synthetic camera + fake JetBot for closed-loop runs without hardware
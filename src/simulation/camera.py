@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from src.communication.image_receiver.protocols import (
+    CONTROL_QUALITY,
+    LENGTH_PREFIX_BYTES,
+    Codec,
+    decode_control,
+    encode_frame,
+)
+from src.core.logging import logger
+from src.simulation.world import World
+
+
+def default_sprite() -> Optional[np.ndarray]:
+    """A person cut from the sample image that ships with ultralytics (COCO class 'person')."""
+    try:
+        from ultralytics.utils import ASSETS
+    except ImportError:  # pragma: no cover
+        return None
+    image = cv2.imread(str(ASSETS / "zidane.jpg"), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    return image[48:720, 743:1141].copy()  # the person on the right
+
+
+class SyntheticCamera:
+    """Pinhole camera on the robot that renders the target into a BGR frame.
+
+    The target is drawn as a sprite pasted at the projected position and size,
+    so a real detector can find it: `sprite_path` (e.g. a photo of a bottle)
+    or, by default, a person from the ultralytics sample image. With
+    `plain=True` a flat shape is drawn instead, which no COCO class matches
+    and is only good for pipeline/latency runs.
+    """
+
+    def __init__(
+            self,
+            width: int = 640,
+            height: int = 480,
+            hfov_deg: float = 62.0,
+            camera_height: float = 0.1,
+            sprite_path: Optional[str] = None,
+            plain: bool = False
+    ) -> None:
+        self.width = width
+        self.height = height
+        self._focal = (width / 2.0) / math.tan(math.radians(hfov_deg) / 2.0)
+        self._camera_height = camera_height
+        self._sprite = cv2.imread(sprite_path, cv2.IMREAD_COLOR) if sprite_path else None
+        if sprite_path and self._sprite is None:
+            raise FileNotFoundError(f"cannot read sprite image {sprite_path}")
+        if not sprite_path and not plain:
+            self._sprite = default_sprite()
+            if self._sprite is None:
+                logger.warning("[SyntheticCamera] default sprite unavailable, drawing a plain shape")
+
+        # Static background: wall and floor, rendered once
+        bg = np.empty((height, width, 3), dtype=np.uint8)
+        horizon = height // 2
+        bg[:horizon] = (200, 190, 180)
+        ramp = np.linspace(90, 150, height - horizon, dtype=np.uint8)[:, None]
+        bg[horizon:] = np.repeat(ramp, width, axis=1)[..., None]
+        self._background = bg
+
+    def render(self, world: World) -> np.ndarray:
+        frame = self._background.copy()
+        bearing = world.bearing()
+        distance = world.distance()
+        if abs(bearing) >= math.pi / 2 or distance < 0.05:
+            return frame
+
+        # Target to the left (+bearing) appears left of the image centre
+        forward = distance * math.cos(bearing)
+        cx = self.width / 2.0 - self._focal * math.tan(bearing)
+        h = max(2, int(self._focal * world.target.height / forward))
+        w = max(2, int(self._focal * world.target.width / forward))
+        # Target stands on the floor
+        bottom = int(self.height / 2.0 + self._focal * self._camera_height / forward)
+        x1, y1 = int(cx - w / 2), bottom - h
+        self._draw(frame, x1, y1, w, h)
+        return frame
+
+    def _draw(self, frame: np.ndarray, x1: int, y1: int, w: int, h: int) -> None:
+        x2, y2 = x1 + w, y1 + h
+        cx1, cy1 = max(0, x1), max(0, y1)
+        cx2, cy2 = min(self.width, x2), min(self.height, y2)
+        if cx1 >= cx2 or cy1 >= cy2:
+            return
+        if self._sprite is not None:
+            patch = cv2.resize(self._sprite, (w, h), interpolation=cv2.INTER_AREA)
+            frame[cy1:cy2, cx1:cx2] = patch[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1]
+        else:
+            cv2.rectangle(frame, (x1, y1 + h // 4), (x2, y2), (40, 120, 30), -1)
+            cv2.rectangle(frame, (x1 + w // 3, y1), (x2 - w // 3, y1 + h // 4), (40, 120, 30), -1)
+
+
+class SimCameraClient:
+    """Streams rendered frames to ImageServer like the real camera client.
+
+    Uses the v1 frame header (capture timestamp and sequence number) and obeys
+    the server's quality hints (fps, resolution, JPEG quality).
+    """
+
+    def __init__(
+            self,
+            world: World,
+            camera: SyntheticCamera,
+            host: str,
+            port: int,
+            fps: float = 5.0,
+            jpeg_quality: int = 80,
+            robot_id: Optional[str] = None
+    ) -> None:
+        self._world = world
+        self._camera = camera
+        self._host = host
+        self._port = port
+        self.fps = fps
+        self.jpeg_quality = jpeg_quality
+        self.size: Optional[tuple[int, int]] = None  # (width, height) requested by the server
+        self._robot_id = robot_id
+        self._task: asyncio.Task | None = None
+        self.frames_sent = 0
+        self.hints_received = 0
+
+    async def __aenter__(self) -> "SimCameraClient":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        reader, writer = await self._connect()
+        hints = asyncio.create_task(self._read_hints(reader))
+        seq = 0
+        try:
+            while True:
+                started = loop.time()
+                data = await loop.run_in_executor(None, self._encode)
+                writer.write(encode_frame(data, Codec.JPEG, seq=seq, robot_id=self._robot_id))
+                await writer.drain()
+                seq += 1
+                self.frames_sent += 1
+                await asyncio.sleep(max(0.0, 1.0 / self.fps - (loop.time() - started)))
+        finally:
+            hints.cancel()
+            writer.close()
+
+    async def _connect(self):
+        while True:
+            try:
+                return await asyncio.open_connection(self._host, self._port)
+            except OSError:
+                await asyncio.sleep(0.2)
+
+    def _encode(self) -> bytes:
+        frame = self._camera.render(self._world)
+        if self.size and self.size != (frame.shape[1], frame.shape[0]):
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        return buf.tobytes()
+
+    async def _read_hints(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                length = int.from_bytes(await reader.readexactly(LENGTH_PREFIX_BYTES), "big")
+                msg = decode_control(await reader.readexactly(length))
+                if msg.get("type") != CONTROL_QUALITY:
+                    continue
+                self.hints_received += 1
+                self.fps = float(msg["fps"])
+                self.jpeg_quality = int(msg["jpeg_quality"])
+                self.size = (int(msg["width"]), int(msg["height"]))
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            logger.warning(f"[SimCameraClient] bad control message: {e}")
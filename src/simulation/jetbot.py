@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import AbstractAsyncContextManager
+
+from src.core.logging import logger
+from src.simulation.world import DiffDriveRobot
+
+
+class FakeJetBot(AbstractAsyncContextManager):
+    """Speaks the JetBot's newline-delimited JSON protocol and drives a DiffDriveRobot."""
+
+    def __init__(self, robot: DiffDriveRobot, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._robot = robot
+        self._host = host
+        self._port = port
+        self._server: asyncio.AbstractServer | None = None
+        self.commands = 0
+        self.connections = 0
+
+    @property
+    def port(self) -> int:
+        """Actual listening port (useful with port=0)."""
+        if self._server is None or not self._server.sockets:
+            return self._port
+        return self._server.sockets[0].getsockname()[1]
+
+    async def __aenter__(self) -> "FakeJetBot":
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        logger.info(f"[FakeJetBot] listening on {self._host}:{self.port}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while line := await reader.readline():
+                try:
+                    cmd = json.loads(line)
+                    self._robot.set_command(float(cmd.get("left", 0.0)), float(cmd.get("right", 0.0)))
+                    self.commands += 1
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"[FakeJetBot] bad command {line!r}: {e}")
+        except ConnectionError:
+            pass
+        finally:
+            # Connection lost: a real JetBot keeps its last command, but stopping is safer here
+            self._robot.set_command(0.0, 0.0)
+            writer.close()
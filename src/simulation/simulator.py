@@ -0,0 +1,216 @@
+"""Headless closed-loop simulator.
+
+Stands in for both the camera client and the JetBot: frames of a target are
+rendered from the simulated robot pose and sent to ImageServer, and the
+left/right commands the server sends back drive a differential-drive model.
+The run is scored on time-to-acquire and bearing error while tracking.
+
+    python -m src.simulation --duration 60
+    python -m src.simulation --duration 60 --target bottle --sprite bottle.png --target-width 0.08
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import socket
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.app.main import App, build_app, start_app
+from src.core.config import AppConfig
+from src.core.logging import logger, setup_logging
+from src.core.metrics import percentiles
+from src.simulation.camera import SimCameraClient, SyntheticCamera
+from src.simulation.jetbot import FakeJetBot
+from src.simulation.world import DiffDriveRobot, Target, World
+
+
+@dataclass
+class TrackingScore:
+    """Ground-truth tracking quality.
+
+    The target is acquired once the detector has reported it continuously for
+    `confirm_s` while it is within `acquire_tolerance_deg` of the robot
+    heading. Being pointed at the target by chance, e.g. during a random-walk
+    scan, does not count. Acquisition is lost when the detector has not
+    reported the target for `confirm_s`. Bearing error is only collected while
+    acquired.
+    """
+    acquire_tolerance_deg: float = 10.0
+    confirm_s: float = 0.5
+    time_to_acquire: Optional[float] = None
+    errors: List[float] = field(default_factory=list)
+    samples: int = 0
+    visible_samples: int = 0
+    detected_samples: int = 0
+    acquired_samples: int = 0
+    acquisitions: int = 0
+    acquired: bool = False
+    _detected_since: Optional[float] = None
+    _last_detected: Optional[float] = None
+
+    def update(self, t: float, bearing_deg: float, visible: bool, detected: bool) -> None:
+        self.samples += 1
+        self.visible_samples += int(visible)
+        self.detected_samples += int(detected)
+        if detected:
+            if self._detected_since is None:
+                self._detected_since = t
+            self._last_detected = t
+        else:
+            self._detected_since = None
+
+        if not self.acquired:
+            held = self._detected_since is not None and t - self._detected_since >= self.confirm_s
+            if held and abs(bearing_deg) <= self.acquire_tolerance_deg:
+                self.acquired = True
+                self.acquisitions += 1
+                if self.time_to_acquire is None:
+                    self.time_to_acquire = t
+        elif self._last_detected is None or t - self._last_detected > self.confirm_s:
+            self.acquired = False
+
+        if self.acquired:
+            self.acquired_samples += 1
+            self.errors.append(abs(bearing_deg))
+
+    def summary(self) -> Dict[str, Any]:
+        n = max(1, self.samples)
+        err = percentiles(self.errors)
+        return {
+            "time_to_acquire_s": self.time_to_acquire,
+            "mean_abs_error_deg": sum(self.errors) / len(self.errors) if self.errors else None,
+            "rms_error_deg": math.sqrt(sum(e * e for e in self.errors) / len(self.errors)) if self.errors else None,
+            "p95_error_deg": err["p95"] if self.errors else None,
+            "visible_fraction": self.visible_samples / n,
+            "detected_fraction": self.detected_samples / n,
+            "acquired_fraction": self.acquired_samples / n,
+            "acquisitions": self.acquisitions,
+        }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Simulator:
+    def __init__(
+            self,
+            cfg: AppConfig,
+            duration: float,
+            targets: List[str],
+            target: Target | None = None,
+            sprite_path: Optional[str] = None,
+            plain: bool = False,
+            camera_fps: float = 5.0,
+            physics_hz: float = 50.0,
+            hfov_deg: float = 62.0
+    ) -> None:
+        self._cfg = cfg
+        self._duration = duration
+        self._targets = targets
+        self._world = World(DiffDriveRobot(), target or Target())
+        self._camera = SyntheticCamera(
+            int(cfg.img_width), int(cfg.img_height), hfov_deg, sprite_path=sprite_path, plain=plain
+        )
+        self._camera_fps = camera_fps
+        self._dt = 1.0 / physics_hz
+        self._half_fov = math.radians(hfov_deg) / 2.0
+        self.score = TrackingScore()
+        # Set while running, for harnesses that sample the live pipeline (benchmarks/soak.py)
+        self.app: App | None = None
+        self.camera_client: SimCameraClient | None = None
+
+    async def run(self) -> Dict[str, Any]:
+        cfg = self._cfg
+        cfg.app_host = "127.0.0.1"
+        cfg.app_port = _free_port()
+
+        async with AsyncExitStack() as stack:
+            jetbot = await stack.enter_async_context(FakeJetBot(self._world.robot))
+            cfg.jetbots = f"sim=127.0.0.1:{jetbot.port}"
+
+            app = self.app = build_app(cfg)
+            app.yolo.set_targets(self._targets)
+            await start_app(app, stack)
+            # The camera stops before the server does
+            async with SimCameraClient(
+                    self._world, self._camera, cfg.app_host, cfg.app_port, fps=self._camera_fps
+            ) as camera:
+                self.camera_client = camera
+                logger.info(f"[Simulator] running {self._duration:.0f}s, targets={self._targets}")
+                await self._physics_loop(app)
+
+            result = self.score.summary()
+            result.update(
+                frames_sent=camera.frames_sent,
+                quality_hints=camera.hints_received,
+                commands_applied=jetbot.commands,
+                inference_latency_ms=(app.yolo.inference_latency or 0.0) * 1000.0,
+                frame_drops=dict(app.yolo.drop_stats),
+                image_server=dict(app.image_server.stats),
+                bus=app.bus.stats(),
+                final_distance_m=self._world.distance(),
+            )
+            if app.watchdog is not None:
+                result["loop_lag_ms"] = app.watchdog.snapshot()
+        return result
+
+    async def _physics_loop(self, app) -> None:
+        loop = asyncio.get_running_loop()
+        start = last = loop.time()
+        while (now := loop.time()) - start < self._duration:
+            self._world.step(now - last)
+            last = now
+            bearing = self._world.bearing()
+            self.score.update(
+                now - start,
+                math.degrees(bearing),
+                visible=abs(bearing) < self._half_fov,
+                detected=app.yolo.detected,
+            )
+            await asyncio.sleep(self._dt)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Closed-loop simulation of the tracking pipeline")
+    parser.add_argument("--duration", type=float, default=30.0, help="simulated seconds (real time)")
+    parser.add_argument("--target", default="person", help="class(es) to track, comma separated")
+    parser.add_argument("--sprite", default=None,
+                        help="image pasted as the target (default: a person from the ultralytics sample image)")
+    parser.add_argument("--plain", action="store_true", help="draw a flat shape instead (not detectable)")
+    parser.add_argument("--target-height", type=float, default=0.25, help="target size in m")
+    parser.add_argument("--target-width", type=float, default=0.15, help="target size in m")
+    parser.add_argument("--target-x", type=float, default=2.0)
+    parser.add_argument("--target-y", type=float, default=1.0)
+    parser.add_argument("--orbit-radius", type=float, default=0.0, help="move the target on a circle (m)")
+    parser.add_argument("--orbit-speed", type=float, default=0.0, help="target speed on the circle (m/s)")
+    parser.add_argument("--fps", type=float, default=5.0, help="camera frame rate")
+    parser.add_argument("--output", default=None, help="write the score as JSON to this file")
+    args = parser.parse_args()
+
+    setup_logging()
+    cfg = AppConfig.load()
+    sim = Simulator(
+        cfg,
+        duration=args.duration,
+        targets=[t.strip() for t in args.target.split(",") if t.strip()],
+        target=Target(
+            args.target_x, args.target_y, height=args.target_height, width=args.target_width,
+            orbit_radius=args.orbit_radius, orbit_speed=args.orbit_speed,
+        ),
+        sprite_path=args.sprite,
+        plain=args.plain,
+        camera_fps=args.fps,
+    )
+    result = asyncio.run(sim.run())
+    text = json.dumps(result, indent=2, default=str)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+
+
+def wrap_angle(a: float) -> float:
+    """Wrap an angle to [-pi, pi)."""
+    return (a + math.pi) % (2 * math.pi) - math.pi
+
+
+@dataclass
+class DiffDriveRobot:
+    """Differential-drive kinematics driven by the same left/right values as the JetBot.
+
+    A command of 1.0 maps to `max_wheel_speed` m/s. The defaults reproduce the
+    turn rate RandomWalkDaemon was calibrated for (turn_speed 0.1 ->
+    ~1 / 0.0105 deg/s).
+    """
+    x: float = 0.0
+    y: float = 0.0
+    theta: float = 0.0  # rad, counter-clockwise, 0 = +x
+    wheel_base: float = 0.12
+    max_wheel_speed: float = 1.0
+    left: float = 0.0
+    right: float = 0.0
+
+    def set_command(self, left: float, right: float) -> None:
+        self.left = max(-1.0, min(1.0, left))
+        self.right = max(-1.0, min(1.0, right))
+
+    def step(self, dt: float) -> None:
+        vl = self.left * self.max_wheel_speed
+        vr = self.right * self.max_wheel_speed
+        v = (vl + vr) / 2.0
+        omega = (vr - vl) / self.wheel_base
+        self.x += v * math.cos(self.theta) * dt
+        self.y += v * math.sin(self.theta) * dt
+        self.theta = wrap_angle(self.theta + omega * dt)
+
+
+@dataclass
+class Target:
+    """Object to track; optionally moves on a circle around its start position."""
+    x: float = 2.0
+    y: float = 0.0
+    height: float = 0.25  # m
+    width: float = 0.10  # m
+    orbit_radius: float = 0.0
+    orbit_speed: float = 0.0  # m/s along the circle
+    _cx: float = field(init=False, repr=False, compare=False, default=0.0)
+    _cy: float = field(init=False, repr=False, compare=False, default=0.0)
+    _phase: float = field(init=False, repr=False, compare=False, default=0.0)
+
+    def __post_init__(self) -> None:
+        self._cx, self._cy = self.x, self.y
+
+    def step(self, dt: float) -> None:
+        if self.orbit_radius <= 0 or self.orbit_speed == 0:
+            return
+        self._phase += self.orbit_speed / self.orbit_radius * dt
+        self.x = self._cx + self.orbit_radius * math.cos(self._phase)
+        self.y = self._cy + self.orbit_radius * math.sin(self._phase)
+
+
+@dataclass
+class World:
+    robot: DiffDriveRobot
+    target: Target
+    time: float = 0.0
+
+    def step(self, dt: float) -> None:
+        self.robot.step(dt)
+        self.target.step(dt)
+        self.time += dt
+
+    def bearing(self) -> float:
+        """Angle of the target relative to the robot heading (rad, + = left)."""
+        dx = self.target.x - self.robot.x
+        dy = self.target.y - self.robot.y
+        return wrap_angle(math.atan2(dy, dx) - self.robot.theta)
+
+    def distance(self) -> float:
+        return math.hypot(self.target.x - self.robot.x, self.target.y - self.robot.y)
@@ -19,6 +19,11 @@ class Commander:
         return self
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._control_task.cancel()
+        try:
+            await self._control_task
+        except asyncio.CancelledError:
+            pass
         logger.info("MotorController stopped")
 #
 #     # Hardware integration point